@@ -5,13 +5,21 @@ Deployable on Render with POST endpoint for video URL processing
 """
 
 from flask import Flask, request, jsonify, send_file, Response, render_template
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
 import os
 import tempfile
 import threading
 import time
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
-import uuid
+import secrets
+import re
+import json
+import sqlite3
 import requests
 from simple_video_extractor import SimpleVideoExtractor
 import logging
@@ -20,54 +28,241 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and request.get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for all routes
 
 # Global storage for download status
 download_status = {}
 download_files = {}
 
+# Guards adding and removing entries in download_status/download_files so
+# scans over them never see the dicts change size mid-iteration. Field
+# updates on an existing entry are single dict writes and need no lock.
+status_lock = threading.Lock()
+
+# Number of downloads currently transferring data, maintained under status_lock
+active_downloads = 0
+
+# Completed files expire FILE_TTL seconds after they finish. Expiry times are
+# kept in a min-heap of (monotonic deadline, download_id), guarded by status_lock,
+# and a background thread sweeps it every CLEANUP_INTERVAL seconds.
+FILE_TTL = 3600
+CLEANUP_INTERVAL = 60
+expiry_heap = []
+
+# Extraction results are reused for EXTRACT_CACHE_TTL seconds so /download
+# right after /extract does not run the extractor a second time. Entries older
+# than EXTRACT_CACHE_REFRESH are still served, but also re-extracted in the
+# background so the next caller gets fresh links without waiting for them.
+EXTRACT_CACHE_SIZE = 1024
+EXTRACT_CACHE_TTL = 600
+EXTRACT_CACHE_REFRESH = 300
+EXTRACT_REFRESH_WORKERS = 2
+
+# Downloads are written through a 1 MiB buffer so many network chunks
+# are flushed to disk with a single write syscall
+DOWNLOAD_WRITE_BUFFER = 1024 * 1024
+
+# Network reads are pulled in 64 KiB blocks. A read waits until the whole
+# block has arrived, so with large blocks a slow upstream would hold back
+# progress updates, cancel checks and /stream clients; the write buffer
+# above still batches them into large disk writes
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Progress is published to download_status at most once per MiB or 200 ms
+PROGRESS_PUBLISH_BYTES = 1024 * 1024
+PROGRESS_PUBLISH_INTERVAL = 0.2
+
+# Background downloads run on a bounded pool; once DL_WORKERS are busy and
+# DL_QUEUE more are waiting, new background downloads are rejected with 429
+DOWNLOAD_WORKERS = int(os.environ.get('DL_WORKERS', 8))
+MAX_QUEUED_DOWNLOADS = int(os.environ.get('DL_QUEUE', 16))
+
+# Every published progress update or status transition bumps status_version and
+# notifies status_changed, which /status/<id>/stream waits on
+status_changed = threading.Condition()
+status_version = 0
+STATUS_STREAM_KEEPALIVE = 15
+
+# Each open status stream holds one of gunicorn's 16 threads for the whole
+# download, so only SSE_STREAMS may be open at once; further clients get a
+# 503 and fall back to polling /status
+MAX_STATUS_STREAMS = int(os.environ.get('SSE_STREAMS', 4))
+status_stream_slots = threading.BoundedSemaphore(MAX_STATUS_STREAMS)
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Download IDs are 16 random hex digits. They are the only thing guarding
+# /status, /download and /cancel for a download, so they must not be guessable.
+DOWNLOAD_ID_BYTES = 8
+
+# Download state is mirrored to this SQLite database so it survives restarts
+STATE_DB = os.environ.get('STATE_DB', os.path.join(tempfile.gettempdir(), 'video_extractor_state.db'))
+
+class DownloadStateStore:
+    """SQLite (WAL) mirror of download_status/download_files. The in-memory
+    dicts stay the source of truth for requests; rows are written on status
+    transitions and read back once at startup."""
+    
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS downloads ('
+                'id TEXT PRIMARY KEY, status TEXT NOT NULL, file_path TEXT, expires_at REAL)'
+            )
+    
+    def save(self, download_id, status, file_path=None, expires_at=None):
+        """Insert or replace the stored state of a download"""
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO downloads (id, status, file_path, expires_at) VALUES (?, ?, ?, ?)',
+                (download_id, json.dumps(status), file_path, expires_at)
+            )
+    
+    def delete(self, download_ids):
+        """Forget the given downloads"""
+        with self.lock:
+            self.conn.executemany('DELETE FROM downloads WHERE id = ?', [(i,) for i in download_ids])
+    
+    def load(self):
+        """Return (id, status, file_path, expires_at) rows for every stored download"""
+        with self.lock:
+            rows = self.conn.execute('SELECT id, status, file_path, expires_at FROM downloads').fetchall()
+        return [(download_id, json.loads(status), file_path, expires_at)
+                for download_id, status, file_path, expires_at in rows]
+
 class VideoDownloadManager:
     def __init__(self):
         self.extractor = SimpleVideoExtractor()
         self.temp_dir = tempfile.mkdtemp()
-        
-    def extract_sources(self, url):
-        """Extract video sources from URL"""
+        # LRU of url -> (stored_at, sources), plus striped locks so concurrent
+        # misses for the same URL wait for one extraction instead of repeating it
+        self.extract_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.extract_locks = [threading.Lock() for _ in range(64)]
+        # URLs with a background refresh queued or running, guarded by cache_lock
+        self.refreshing = set()
+        self.refresh_pool = ThreadPoolExecutor(max_workers=EXTRACT_REFRESH_WORKERS,
+                                               thread_name_prefix='extract-refresh')
+        
+    def extract_sources(self, url, refresh=False):
+        """Extract video sources from URL, reusing recent results
+        
+        refresh=True skips the cache and replaces its entry.
+        """
+        key = url.strip()
+        if not refresh:
+            sources = self._get_cached_sources(key)
+            if sources is not None:
+                return sources
+        
+        with self.extract_locks[hash(key) % len(self.extract_locks)]:
+            if not refresh:
+                sources = self._get_cached_sources(key)
+                if sources is not None:
+                    return sources
+            return self._extract_and_cache(key, url)
+    
+    def _extract_and_cache(self, key, url):
+        """Run the extractor for url and cache a non-empty result under key"""
         try:
             sources = self.extractor.extract_video_sources(url)
-            return sources
         except Exception as e:
             logger.error(f"Source extraction failed: {e}")
             return []
+        
+        # Empty results are not cached so transient failures can be retried
+        if sources:
+            with self.cache_lock:
+                self.extract_cache[key] = (time.monotonic(), sources)
+                self.extract_cache.move_to_end(key)
+                if len(self.extract_cache) > EXTRACT_CACHE_SIZE:
+                    self.extract_cache.popitem(last=False)
+        return sources
     
-    def download_video_async(self, download_id, video_source, output_path):
-        """Download video asynchronously and update status"""
+    def _refresh_sources(self, key):
+        """Re-extract a stale cache entry; runs on refresh_pool"""
+        try:
+            with self.extract_locks[hash(key) % len(self.extract_locks)]:
+                self._extract_and_cache(key, key)
+        finally:
+            with self.cache_lock:
+                self.refreshing.discard(key)
+    
+    def _get_cached_sources(self, key):
+        """Return unexpired cached sources for key, or None
+        
+        Stale entries are returned as well, with a background refresh queued.
+        """
+        with self.cache_lock:
+            entry = self.extract_cache.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age >= EXTRACT_CACHE_TTL:
+                del self.extract_cache[key]
+                return None
+            self.extract_cache.move_to_end(key)
+            if age >= EXTRACT_CACHE_REFRESH and key not in self.refreshing:
+                self.refreshing.add(key)
+                self.refresh_pool.submit(self._refresh_sources, key)
+        return entry[1]
+    
+    def download_video_async(self, download_id, video_source, output_path, referer=None):
+        """Download video asynchronously and update status
+        
+        referer is the page the source was extracted from; it is passed in
+        rather than read off the shared extractor, which other requests reuse.
+        """
+        global active_downloads
+        counted = False
         try:
             # Initialize status - make sure it's set before any processing
-            download_status[download_id] = {
-                'status': 'initializing',
-                'progress': 0,
-                'message': 'Initializing download...',
-                'started_at': datetime.now().isoformat(),
-                'file_path': output_path,
-                'download_id': download_id,
-                'source_url': video_source['url'][:100] + '...' if len(video_source['url']) > 100 else video_source['url']
-            }
+            with status_lock:
+                download_status[download_id] = {
+                    'status': 'initializing',
+                    'progress': 0,
+                    'message': 'Initializing download...',
+                    'started_at': datetime.now().isoformat(),
+                    'file_path': output_path,
+                    'download_id': download_id,
+                    'source_url': video_source['url'][:100] + '...' if len(video_source['url']) > 100 else video_source['url']
+                }
             
             # Update to downloading status
             download_status[download_id].update({
                 'status': 'downloading',
                 'message': 'Starting download...'
             })
+            with status_lock:
+                active_downloads += 1
+            counted = True
+            publish_status(download_id)
             
             # Custom download with progress tracking
             url = video_source['url']
             
             # Enhanced headers for protected downloads
             download_headers = self.extractor.session.headers.copy()
-            if self.extractor.original_url:
-                download_headers['Referer'] = self.extractor.original_url
+            if referer:
+                download_headers['Referer'] = referer
             
             download_headers.update({
                 'Range': 'bytes=0-',
@@ -85,24 +280,39 @@ class VideoDownloadManager:
             total_size = int(response.headers.get('content-length', 0))
             downloaded = 0
             
-            download_status[download_id]['total_size'] = total_size
-            download_status[download_id]['message'] = f'Downloading... (Size: {total_size / (1024*1024):.2f} MB)'
+            status = download_status[download_id]
+            status['total_size'] = total_size
+            status['message'] = f'Downloading... (Size: {total_size / (1024*1024):.2f} MB)'
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            download_status[download_id]['progress'] = progress
-                            download_status[download_id]['downloaded'] = downloaded
+            # Only the byte counter is published, and only every PROGRESS_PUBLISH_BYTES
+            # or PROGRESS_PUBLISH_INTERVAL; /status derives the percentage when polled
+            next_publish = PROGRESS_PUBLISH_BYTES
+            next_publish_at = time.monotonic() + PROGRESS_PUBLISH_INTERVAL
+            
+            # Read straight from the urllib3 response rather than through iter_content's
+            # generator; identity encoding was requested so decoding is a no-op
+            with open(output_path, 'wb', buffering=DOWNLOAD_WRITE_BUFFER) as f:
+                while True:
+                    chunk = response.raw.read(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+                    if not chunk:
+                        break
+                    
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    
+                    now = time.monotonic()
+                    if downloaded >= next_publish or now >= next_publish_at:
+                        status['downloaded'] = downloaded
+                        next_publish = downloaded + PROGRESS_PUBLISH_BYTES
+                        next_publish_at = now + PROGRESS_PUBLISH_INTERVAL
+                        notify_status_change()
                         
                         # Check if download was cancelled
-                        if download_status[download_id].get('cancelled', False):
+                        if status.get('cancelled', False):
                             break
             
+            status['downloaded'] = downloaded
+            
             if downloaded > 0 and not download_status[download_id].get('cancelled', False):
                 download_status[download_id].update({
                     'status': 'completed',
@@ -112,7 +322,10 @@ class VideoDownloadManager:
                     'file_size': downloaded,
                     'file_ready': True
                 })
-                download_files[download_id] = output_path
+                with status_lock:
+                    download_files[download_id] = output_path
+                    expires_at = schedule_expiry(download_id)
+                publish_status(download_id, expires_at)
                 logger.info(f"Download {download_id} completed successfully. File: {output_path}")
             else:
                 download_status[download_id].update({
@@ -121,16 +334,20 @@ class VideoDownloadManager:
                     'completed_at': datetime.now().isoformat(),
                     'file_ready': False
                 })
+                with status_lock:
+                    expires_at = schedule_expiry(download_id)
+                publish_status(download_id, expires_at)
                 logger.error(f"Download {download_id} failed or was cancelled")
                 
         except Exception as e:
             logger.error(f"Download {download_id} failed: {e}")
             # Ensure the download_id exists in status before updating
-            if download_id not in download_status:
-                download_status[download_id] = {
-                    'download_id': download_id,
-                    'started_at': datetime.now().isoformat()
-                }
+            with status_lock:
+                if download_id not in download_status:
+                    download_status[download_id] = {
+                        'download_id': download_id,
+                        'started_at': datetime.now().isoformat()
+                    }
             
             download_status[download_id].update({
                 'status': 'failed',
@@ -140,9 +357,107 @@ class VideoDownloadManager:
                 'file_ready': False,
                 'error': str(e)
             })
+            with status_lock:
+                expires_at = schedule_expiry(download_id)
+            publish_status(download_id, expires_at)
+        
+        finally:
+            if counted:
+                with status_lock:
+                    active_downloads -= 1
+
+# Global download manager, worker pool and state store; created by init_app()
+download_manager = None
+download_pool = None
+state_store = None
+download_slots = threading.BoundedSemaphore(DOWNLOAD_WORKERS + MAX_QUEUED_DOWNLOADS)
+app_initialized = False
+init_lock = threading.Lock()
+
+def notify_status_change():
+    """Wake /status streams waiting for a status update"""
+    global status_version
+    with status_changed:
+        status_version += 1
+        status_changed.notify_all()
+
+def schedule_expiry(download_id, ttl=FILE_TTL):
+    """Hand a finished download to the sweeper after ttl seconds
+    
+    Every terminal status is scheduled, not only completed ones, so failed
+    rows do not pile up in memory and in the state store. Call with
+    status_lock held; returns the wall-clock expiry to persist.
+    """
+    heapq.heappush(expiry_heap, (time.monotonic() + ttl, download_id))
+    return time.time() + ttl
+
+def publish_status(download_id, expires_at=None):
+    """Record a status transition: mirror it to the state store and wake /status streams"""
+    entry = download_status.get(download_id)
+    if entry is None:
+        return
+    
+    # Persistence is best effort; a failing disk must not fail the download itself
+    try:
+        state_store.save(download_id, entry.copy(), download_files.get(download_id), expires_at)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not persist state for download {download_id}: {e}")
+    
+    notify_status_change()
+
+def restore_downloads():
+    """Reload persisted downloads into memory after a restart"""
+    try:
+        rows = state_store.load()
+    except sqlite3.Error as e:
+        logger.warning(f"Could not restore download state: {e}")
+        return
+    
+    now = time.time()
+    for download_id, status, file_path, expires_at in rows:
+        # Transfers that were running when the process stopped cannot resume
+        if status.get('status') in ('queued', 'initializing', 'downloading'):
+            status.update({
+                'status': 'failed',
+                'message': 'Download was interrupted by a server restart',
+                'completed_at': datetime.now().isoformat(),
+                'file_ready': False
+            })
+        
+        with status_lock:
+            download_status[download_id] = status
+            if file_path and os.path.exists(file_path):
+                download_files[download_id] = file_path
+            expires_at = schedule_expiry(download_id, (expires_at - now) if expires_at else FILE_TTL)
+        publish_status(download_id, expires_at)
+    
+    if rows:
+        logger.info(f"Restored {len(rows)} download(s) from {STATE_DB}")
+
+# Absolute http(s) URL, longer than 20 characters, with no '|' separators
+# left over from malformed multi-source strings
+DOWNLOADABLE_URL_RE = re.compile(r'(?=.{21})https?://[^|]*\Z', re.DOTALL)
+
+class FilenameCharMap(dict):
+    """str.translate table for filenames: spaces become '_', alphanumerics and
+    '-_.' are kept and everything else is dropped. Codepoints are classified on
+    first use and cached, so translate() runs in C for characters seen before."""
+    
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char in '-_.' else None
+        self[codepoint] = value
+        return value
+
+FILENAME_CHARS = FilenameCharMap({ord(' '): '_'})
 
-# Global download manager
-download_manager = VideoDownloadManager()
+def sanitize_title(title):
+    """Turn a video title into a filesystem-safe filename stem"""
+    return title.translate(FILENAME_CHARS)[:50]
+
+def is_downloadable_url(url):
+    """Check that an extracted URL is a well-formed absolute http(s) URL"""
+    return DOWNLOADABLE_URL_RE.match(url) is not None
 
 @app.route('/', methods=['GET'])
 def home():
@@ -157,6 +472,7 @@ def home():
                 'POST /extract': 'Extract video sources from URL',
                 'POST /download': 'Start video download',
                 'GET /status/<download_id>': 'Check download status',
+                'GET /status/<download_id>/stream': 'Stream download status as server-sent events',
                 'GET /download/<download_id>': 'Download completed file',
                 'GET /health': 'Health check'
             },
@@ -183,7 +499,7 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'active_downloads': len([d for d in download_status.values() if d['status'] == 'downloading'])
+        'active_downloads': active_downloads
     })
 
 @app.route('/extract', methods=['POST'])
@@ -197,7 +513,7 @@ def extract_sources():
         url = data['url']
         logger.info(f"Extracting sources from: {url}")
         
-        sources = download_manager.extract_sources(url)
+        sources = download_manager.extract_sources(url, refresh=bool(data.get('refresh')))
         
         if not sources:
             return jsonify({
@@ -239,6 +555,9 @@ def start_download():
             return jsonify({'error': 'URL is required'}), 400
         
         url = data['url']
+        # Sent as Referer by the download, which may run after other requests
+        # have extracted different pages
+        referer = url.strip()
         quality_preference = data.get('quality', 'best')
         download_type = data.get('type', 'direct')  # 'direct' or 'background'
         
@@ -254,14 +573,7 @@ def start_download():
             }), 404
         
         # Filter out invalid URLs first
-        valid_sources = []
-        for source in sources:
-            source_url = source['url']
-            if (source_url.startswith(('http://', 'https://')) and 
-                not source_url.startswith(',//') and 
-                '|' not in source_url and
-                len(source_url) > 20):
-                valid_sources.append(source)
+        valid_sources = [source for source in sources if is_downloadable_url(source['url'])]
         
         if not valid_sources:
             return jsonify({
@@ -274,8 +586,8 @@ def start_download():
         # Select best source
         selected_source = None
         if quality_preference == 'best':
-            valid_sources.sort(key=lambda x: (x['quality'], 1 if '.mp4' in x['url'] else 0), reverse=True)
-            selected_source = valid_sources[0]
+            # Single pass instead of a full sort; ties prefer .mp4, then the earliest source
+            selected_source = max(valid_sources, key=lambda x: (x['quality'], '.mp4' in x['url']))
         elif quality_preference == 'worst':
             selected_source = min(valid_sources, key=lambda x: x['quality'])
         else:
@@ -290,23 +602,50 @@ def start_download():
         
         # For direct download, return streaming response
         if download_type == 'direct':
-            return stream_video_download(selected_source)
+            return stream_video_download(selected_source, referer)
         
         # For background download (original method)
         else:
-            download_id = str(uuid.uuid4())
-            title = selected_source.get('title', 'video').replace(' ', '_')
-            title = ''.join(c for c in title if c.isalnum() or c in '-_.')[:50]
-            format_ext = selected_source.get('format', 'mp4')
-            output_filename = f"{title}_{download_id[:8]}.{format_ext}"
-            output_path = os.path.join(download_manager.temp_dir, output_filename)
+            if not download_slots.acquire(blocking=False):
+                return jsonify({
+                    'error': 'Too many downloads in progress. Try again later.',
+                    'url': url
+                }), 429
             
-            download_thread = threading.Thread(
-                target=download_manager.download_video_async,
-                args=(download_id, selected_source, output_path)
-            )
-            download_thread.daemon = True
-            download_thread.start()
+            # The slot is released by the future's callback; until submit
+            # succeeds, a failure here has to give it back itself
+            download_id = secrets.token_hex(DOWNLOAD_ID_BYTES)
+            try:
+                title = sanitize_title(selected_source.get('title') or 'video')
+                format_ext = selected_source.get('format', 'mp4')
+                output_filename = f"{title}_{download_id}.{format_ext}"
+                output_path = os.path.join(download_manager.temp_dir, output_filename)
+                
+                # Register the download before queueing it so /status knows about it
+                # while it waits for a free worker
+                with status_lock:
+                    download_status[download_id] = {
+                        'status': 'queued',
+                        'progress': 0,
+                        'message': 'Waiting for a free download slot...',
+                        'download_id': download_id
+                    }
+                publish_status(download_id)
+                
+                future = download_pool.submit(
+                    download_manager.download_video_async,
+                    download_id, selected_source, output_path, referer
+                )
+            except BaseException:
+                with status_lock:
+                    download_status.pop(download_id, None)
+                try:
+                    state_store.delete([download_id])
+                except sqlite3.Error:
+                    pass
+                download_slots.release()
+                raise
+            future.add_done_callback(lambda _: download_slots.release())
             
             return jsonify({
                 'success': True,
@@ -331,20 +670,84 @@ def start_download():
 @app.route('/status/<download_id>', methods=['GET'])
 def get_download_status(download_id):
     """Get download status"""
-    if download_id not in download_status:
+    status = build_status_payload(download_id)
+    if status is None:
         logger.warning(f"Status requested for unknown download ID: {download_id}")
+        return status_not_found(download_id)
+    
+    logger.info(f"Status check for {download_id}: {status['status']} - {status.get('progress', 0)}%")
+    return jsonify(status)
+
+@app.route('/status/<download_id>/stream', methods=['GET'])
+def stream_download_status(download_id):
+    """Push download status as server-sent events until the download finishes"""
+    if download_id not in download_status:
+        return status_not_found(download_id)
+    
+    if not status_stream_slots.acquire(blocking=False):
         return jsonify({
-            'error': 'Download ID not found',
-            'download_id': download_id,
-            'message': 'This download ID does not exist or has been cleaned up',
-            'status': 'not_found'
-        }), 404
+            'error': 'Too many status streams open. Poll /status instead.',
+            'download_id': download_id
+        }), 503, {'Retry-After': str(STATUS_STREAM_KEEPALIVE)}
     
-    status = download_status[download_id].copy()
+    def generate():
+        seen_version = -1
+        last_event = None
+        while True:
+            with status_changed:
+                status_changed.wait_for(lambda: status_version != seen_version, timeout=STATUS_STREAM_KEEPALIVE)
+                seen_version = status_version
+            
+            status = build_status_payload(download_id)
+            if status is None:
+                yield b'event: not_found\ndata: {}\n\n'
+                return
+            
+            # Only send an event when something the client sees has changed
+            event = b'data: ' + orjson.dumps(status) + b'\n\n'
+            if event != last_event:
+                yield event
+                last_event = event
+            else:
+                yield b': keepalive\n\n'
+            
+            if status['status'] in TERMINAL_STATUSES:
+                return
+    
+    response = Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Runs when the server closes the response, whether the stream finished
+    # or the client went away
+    response.call_on_close(status_stream_slots.release)
+    return response
+
+def status_not_found(download_id):
+    """404 response for an unknown download ID"""
+    return jsonify({
+        'error': 'Download ID not found',
+        'download_id': download_id,
+        'message': 'This download ID does not exist or has been cleaned up',
+        'status': 'not_found'
+    }), 404
+
+def build_status_payload(download_id):
+    """Snapshot a download's status for API responses, or None if unknown"""
+    entry = download_status.get(download_id)
+    if entry is None:
+        return None
+    
+    status = entry.copy()
+    
+    # Progress is computed here from the raw byte counters published by the download thread
+    if status['status'] == 'downloading' and status.get('total_size', 0) > 0:
+        status['progress'] = (status.get('downloaded', 0) / status['total_size']) * 100
     
     # Add additional info for completed downloads
-    if status['status'] == 'completed' and download_id in download_files:
-        file_path = download_files[download_id]
+    file_path = download_files.get(download_id)
+    if status['status'] == 'completed' and file_path:
         if os.path.exists(file_path):
             status['file_ready'] = True
             if 'file_size' not in status:
@@ -353,71 +756,112 @@ def get_download_status(download_id):
             status['file_ready'] = False
             status['message'] = 'Download completed but file not found'
     
-    logger.info(f"Status check for {download_id}: {status['status']} - {status.get('progress', 0)}%")
-    return jsonify(status)
+    return status
 
 @app.route('/download/<download_id>', methods=['GET'])
 def download_file(download_id):
     """Download the completed file"""
-    if download_id not in download_files:
+    file_path = download_files.get(download_id)
+    if file_path is None:
         return jsonify({'error': 'Download not found or not completed'}), 404
     
-    file_path = download_files[download_id]
-    
     if not os.path.exists(file_path):
         return jsonify({'error': 'File not found'}), 404
     
     # Get original filename
     filename = os.path.basename(file_path)
     
-    def generate():
-        with open(file_path, 'rb') as f:
-            while True:
-                data = f.read(8192)
-                if not data:
-                    break
-                yield data
-    
-    return Response(
-        generate(),
+    # send_file hands the file to the WSGI server's file wrapper (sendfile under gunicorn)
+    # and answers conditional and Range requests itself
+    return send_file(
+        file_path,
         mimetype='application/octet-stream',
-        headers={
-            'Content-Disposition': f'attachment; filename="{filename}"',
-            'Content-Length': str(os.path.getsize(file_path))
-        }
+        as_attachment=True,
+        download_name=filename,
+        conditional=True
     )
 
 @app.route('/cancel/<download_id>', methods=['POST'])
 def cancel_download(download_id):
     """Cancel an ongoing download"""
-    if download_id not in download_status:
+    entry = download_status.get(download_id)
+    if entry is None:
         return jsonify({'error': 'Download ID not found'}), 404
     
-    if download_status[download_id]['status'] == 'downloading':
-        download_status[download_id]['cancelled'] = True
-        download_status[download_id]['status'] = 'cancelled'
-        download_status[download_id]['message'] = 'Download cancelled by user'
+    if entry['status'] == 'downloading':
+        entry['cancelled'] = True
+        entry['status'] = 'cancelled'
+        entry['message'] = 'Download cancelled by user'
+        publish_status(download_id)
         return jsonify({'success': True, 'message': 'Download cancelled'})
     else:
         return jsonify({'error': 'Download is not active'}), 400
 
+def sweep_expired_downloads():
+    """Delete downloads whose TTL has passed: their file, if any, and their status"""
+    now = time.monotonic()
+    expired_ids = []
+    expired = []
+    
+    with status_lock:
+        while expiry_heap and expiry_heap[0][0] <= now:
+            _, download_id = heapq.heappop(expiry_heap)
+            file_path = download_files.pop(download_id, None)
+            download_status.pop(download_id, None)
+            expired_ids.append(download_id)
+            if file_path:
+                expired.append(file_path)
+    
+    # Remove files outside the lock so status requests are not held up by disk I/O
+    for file_path in expired:
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+    
+    if expired_ids:
+        try:
+            state_store.delete(expired_ids)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not remove expired downloads from state store: {e}")
+    
+    return len(expired)
+
+def cleanup_worker():
+    """Periodically sweep expired downloads"""
+    while True:
+        time.sleep(CLEANUP_INTERVAL)
+        try:
+            cleaned_count = sweep_expired_downloads()
+            if cleaned_count:
+                logger.info(f"Cleaned up {cleaned_count} expired download(s)")
+        except Exception as e:
+            logger.error(f"Background cleanup failed: {e}")
+
+def init_app():
+    """Set up the serving process: download manager, worker pool, state store,
+    restored downloads and the cleanup sweeper.
+    
+    Called by `python app.py` below and by gunicorn's post_worker_init hook
+    (gunicorn.conf.py), never at import time: yt-dlp's spawned worker processes
+    re-import the main module, and must not restore or sweep downloads.
+    """
+    global download_manager, download_pool, state_store, app_initialized
+    with init_lock:
+        if app_initialized:
+            return
+        download_manager = VideoDownloadManager()
+        download_pool = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='download')
+        state_store = DownloadStateStore(STATE_DB)
+        restore_downloads()
+        threading.Thread(target=cleanup_worker, name='cleanup', daemon=True).start()
+        app_initialized = True
+
 @app.route('/cleanup', methods=['POST'])
 def cleanup_files():
-    """Clean up old download files (admin endpoint)"""
+    """Clean up expired download files now instead of waiting for the background sweep (admin endpoint)"""
     try:
-        cleaned_count = 0
-        current_time = time.time()
-        
-        # Clean up files older than 1 hour
-        for download_id, file_path in list(download_files.items()):
-            if os.path.exists(file_path):
-                file_age = current_time - os.path.getctime(file_path)
-                if file_age > 3600:  # 1 hour
-                    os.remove(file_path)
-                    del download_files[download_id]
-                    if download_id in download_status:
-                        del download_status[download_id]
-                    cleaned_count += 1
+        cleaned_count = sweep_expired_downloads()
         
         return jsonify({
             'success': True,
@@ -428,21 +872,20 @@ def cleanup_files():
     except Exception as e:
         return jsonify({'error': f'Cleanup failed: {str(e)}'}), 500
 
-def stream_video_download(video_source):
+def stream_video_download(video_source, referer=None):
     """Stream video download directly to user"""
     try:
         url = video_source['url']
         
         # Create filename
-        title = video_source.get('title', 'video').replace(' ', '_')
-        title = ''.join(c for c in title if c.isalnum() or c in '-_.')[:50]
+        title = sanitize_title(video_source.get('title', 'video'))
         format_ext = video_source.get('format', 'mp4')
         filename = f"{title}.{format_ext}"
         
         # Set up headers for video download
         headers = download_manager.extractor.session.headers.copy()
-        if download_manager.extractor.original_url:
-            headers['Referer'] = download_manager.extractor.original_url
+        if referer:
+            headers['Referer'] = referer
         
         headers.update({
             'Accept': '*/*',
@@ -460,7 +903,7 @@ def stream_video_download(video_source):
         # Create a generator to stream the content
         def generate():
             try:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
                     if chunk:
                         yield chunk
             except Exception as e:
@@ -508,5 +951,6 @@ def download_direct():
         return jsonify({'error': f'Direct download failed: {str(e)}'}), 500
 
 if __name__ == '__main__':
+    init_app()
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
\ No newline at end of file
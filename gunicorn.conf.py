@@ -0,0 +1,7 @@
+# gunicorn loads ./gunicorn.conf.py automatically, so the start command in
+# Procfile / render.yaml needs no extra flag
+
+def post_worker_init(worker):
+    """Start the app's background work in the worker that serves requests"""
+    from app import init_app
+    init_app()
@@ -5,23 +5,754 @@ Extracts downloadable video URLs from streaming websites
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
 import re
 import json
+import base64
+import os
+import errno
+import shutil
 import urllib.parse
 from urllib.parse import urljoin, urlparse
 import sys
-from typing import List, Dict, Optional
-import yt_dlp
+import time
+import signal
+import threading
+import functools
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from typing import List, Dict, Optional, Tuple
+
+try:
+    # Optional: RE2 scans in linear time, far faster than re on large pages
+    import re2
+except ImportError:
+    re2 = None
+
+
+# Iframe and API sub-requests are network-bound, so they are fetched
+# concurrently over the pooled session instead of one after another
+SUBFETCH_WORKERS = 8
+
+# Page bodies are scanned up to this many bytes
+MAX_SCAN_BYTES = 2 * 1024 * 1024
+
+# Extraction stops once this many direct MP4 sources of 720p or better are found
+EARLY_EXIT_SOURCES = 2
+
+# Download write size. Large chunks keep write syscalls low on fast links;
+# slow connections can go down to the minimum.
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+MIN_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+MAX_DOWNLOAD_CHUNK_SIZE = 8 << 20
+
+# Downloads with a known length start at about 1/512 of the file, within
+# these bounds, then adapt to the throughput seen over each window: shrink when
+# the rate falls below a fraction of the best window, grow when writes are fast.
+INITIAL_CHUNK_CAP = 4 << 20
+CHUNK_WINDOW_SECONDS = 2.0
+CHUNK_SHRINK_RATIO = 0.8
+CHUNK_FAST_WRITE_SECONDS = 0.005
+
+# The adaptive size above is how much is written at once; the network is
+# read in blocks of at most this size, since a read waits until its whole
+# block has arrived and would stall progress on a slow link
+DOWNLOAD_READ_SIZE = 64 * 1024
+
+# Files at least this large are fetched as parallel byte ranges when the
+# server supports them
+RANGE_WORKERS = 4
+RANGE_MIN_SIZE = 8 << 20
+
+# Unwanted response bodies up to this size are read out so their keep-alive
+# connection can be reused by the next download request
+ERROR_BODY_DRAIN_LIMIT = 64 * 1024
+
+# Download progress lines are redrawn at most this often, on stderr
+PROGRESS_INTERVAL = 0.1
+_PROGRESS_FD = 2
+
+# yt-dlp runs in worker processes: it can hang on a slow site and holds the
+# GIL while parsing, so it gets a hard deadline away from the API threads.
+# Results are cached briefly since its signed URLs expire.
+# YTDLP_TIMEOUT is enforced inside the worker, so only the hung job is
+# stopped; the caller waits YTDLP_KILL_GRACE longer before giving up on a
+# worker stuck where the deadline can't reach it and replacing the pool.
+YTDLP_WORKERS = 2
+YTDLP_TIMEOUT = 20
+YTDLP_KILL_GRACE = 10
+YTDLP_FORMAT = 'best[ext=mp4]/best'
+YTDLP_CACHE_SIZE = 512
+YTDLP_CACHE_TTL = 300
+
+# Sites yt-dlp handles natively; elsewhere it runs only as a last resort
+YTDLP_FIRST_DOMAINS = ('youtube.com', 'youtu.be', 'vimeo.com', 'dailymotion.com',
+                       'twitch.tv', 'twitter.com', 'x.com', 'facebook.com',
+                       'instagram.com', 'tiktok.com', 'reddit.com')
+
+# Regex patterns are compiled once at import; the extractor runs them over
+# every fetched page, so per-call compilation/cache lookups add up.
+
+
+def _compile_scan(pattern: str, flags: int = 0):
+    """Compile a pattern that scans whole pages, with RE2 when it is installed.
+
+    Only IGNORECASE and DOTALL are translated. Patterns RE2 can't express
+    (lookarounds, backreferences) fall back to the re module.
+    """
+    if re2 is not None:
+        options = re2.Options()
+        options.case_sensitive = not flags & re.IGNORECASE
+        options.dot_nl = bool(flags & re.DOTALL)
+        try:
+            return re2.compile(pattern, options)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
+
+
+def _alternation(patterns, flags=0):
+    """Join single-group patterns into one regex so a page is scanned once.
+
+    Each alternative keeps its own capture group, so ``match.lastindex`` is
+    the group of whichever alternative matched. Where several alternatives
+    could match at the same position, the first one in list order wins.
+    """
+    return _compile_scan('|'.join(f'(?:{p})' for p in patterns), flags)
+
+
+def _find_all(regex, content: str) -> List[str]:
+    """Return the captured text of every match of an _alternation() regex"""
+    return [m.group(m.lastindex) for m in regex.finditer(content)]
+
+
+@functools.lru_cache(maxsize=4)
+def _lower_page(content: str) -> str:
+    """content.lower(), kept for the few pages being extracted right now.
+
+    Every case-insensitive literal gate on a page shares one lowered copy;
+    str caches its hash, so repeat lookups don't rescan the page.
+    """
+    return content.lower()
+
+
+def _findall_if(needle: str, regex, content: str, ignore_case: bool = False) -> List:
+    """findall, skipped outright when content lacks a literal the pattern needs.
+
+    A substring test is far cheaper than a regex pass, and most player-specific
+    patterns never match a given page. Patterns compiled with IGNORECASE must
+    pass ignore_case and a lowercase needle, so the gate is as case-blind as
+    the pattern it guards.
+    """
+    if needle not in (_lower_page(content) if ignore_case else content):
+        return []
+    return regex.findall(content)
+
+
+def _find_json_values(regex, content: str) -> List[str]:
+    """Return the balanced JSON value opening at group 1 of each regex match"""
+    values = []
+    for match in regex.finditer(content):
+        value = _find_balanced_json(content, match.start(1))
+        if value is not None:
+            values.append(value)
+    return values
+
+
+# Characters that end a bare URL in page source
+_URL_DELIMITERS = frozenset('"<> \t\n\r\f\v')
+
+
+def _find_videoplayback_urls(content: str) -> List[str]:
+    """Find http(s)://.../videoplayback?... URLs without a regex pass.
+
+    Few pages contain '/videoplayback?', so str.find rejects most of them at
+    C speed; each hit is then widened to the URL token around it.
+    """
+    urls = []
+    end_of_content = len(content)
+    pos = 0
+    while True:
+        hit = content.find('/videoplayback?', pos)
+        if hit < 0:
+            return urls
+        
+        start = hit
+        while start > 0 and content[start - 1] not in _URL_DELIMITERS:
+            start -= 1
+        end = hit + len('/videoplayback?')
+        while end < end_of_content and content[end] not in _URL_DELIMITERS:
+            end += 1
+        pos = end
+        
+        # The URL runs from the first scheme in the token that still has a
+        # host before the token's last '/videoplayback?', to the token's end
+        last = content.rfind('/videoplayback?', hit, end)
+        scheme = content.find('http', start, last)
+        while scheme >= 0:
+            if content.startswith('https://', scheme):
+                host = scheme + 8
+            elif content.startswith('http://', scheme):
+                host = scheme + 7
+            else:
+                host = end
+            if host < last:
+                urls.append(content[scheme:end])
+                break
+            scheme = content.find('http', scheme + 1, last)
+
+
+def _unescape_slashes(content: str) -> str:
+    """Turn JSON-escaped slashes (https:\\/\\/...) into plain ones.
+
+    Done once per fetched body so every pattern sees plain URLs and matches
+    need no per-match cleanup.
+    """
+    return content.replace('\\/', '/')
+
+
+def _find_balanced_json(content: str, start: int) -> Optional[str]:
+    """Return the JSON object or array opening at content[start], or None.
+
+    Walks forward once counting brackets and skipping string literals, so
+    nested objects are kept whole and long minified scripts cannot trigger
+    regex backtracking.
+    """
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(content)):
+        char = content[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            depth += 1
+        elif char in '}]':
+            depth -= 1
+            if depth == 0:
+                return content[start:i + 1]
+    return None
+
+
+# Embedded players
+_IFRAME_RE = re.compile(r'<iframe[^>]*src=["\']([^"\']+)["\'][^>]*>', re.IGNORECASE)
+
+_IFRAME_VIDEO_RE = _alternation((
+    r'"file":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+    r'"src":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+    r'"url":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+    r'source:\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
+    r'file:\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
+), re.IGNORECASE)
+
+# JavaScript variables containing video URLs
+_JS_URL_RE = _alternation((
+    r'var\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
+    r'let\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
+    r'const\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
+    r'videoUrl\s*[:=]\s*["\']([^"\']+)["\']',
+    r'streamUrl\s*[:=]\s*["\']([^"\']+)["\']',
+    r'playUrl\s*[:=]\s*["\']([^"\']+)["\']',
+), re.IGNORECASE)
+
+# AJAX calls that might return video URLs, and video URLs in their responses.
+# Each pattern is paired with the lowercase literal it needs, see _findall_if.
+_AJAX_RES = [(needle, _compile_scan(p, re.IGNORECASE)) for needle, p in (
+    ('ajax(', r'ajax\([^)]*url:\s*["\']([^"\']+)["\']'),
+    ('fetch(', r'fetch\(["\']([^"\']+)["\']'),
+    ('xmlhttprequest', r'XMLHttpRequest.*open\([^,]*,\s*["\']([^"\']+)["\']'),
+)]
+
+_API_VIDEO_RE = _alternation((
+    r'"url":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+    r'"file":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+    r'"src":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
+), re.IGNORECASE)
+
+# Patterns specific to streaming sites. Obfuscated atob() URLs need
+# base64 decoding, so they are scanned separately.
+_ATOB_RE = _compile_scan(r'atob\(["\']([^"\']+)["\']', re.IGNORECASE)
+
+_STREAMING_RE = _alternation((
+    # Lazy-loaded player attributes
+    r'data-src=["\']([^"\']*(?:mp4|m3u8|mpd)[^"\']*)["\']',
+    r'data-video=["\']([^"\']*)["\']',
+    
+    # Player configurations
+    r'player\.setup\({[^}]*file:\s*["\']([^"\']+)["\']',
+    r'new\s+Plyr\([^,]*,\s*{[^}]*sources:\s*\[{[^}]*src:\s*["\']([^"\']+)["\']',
+), re.IGNORECASE)
+
+# Unanchored catch-alls start matching anywhere, so in an alternation they
+# would swallow the player configs above; each one gets its own scan.
+_STREAMING_URL_RES = [(needle, _compile_scan(p, re.IGNORECASE)) for needle, p in (
+    # HLS/DASH manifests
+    ('.m3u8', r'([^"\s]+\.m3u8(?:\?[^"\s]*)?)'),
+    ('.mpd', r'([^"\s]+\.mpd(?:\?[^"\s]*)?)'),
+    
+    # Direct video files with query parameters
+    ('://', r'(https?://[^"\s]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v)(?:\?[^"\s]*)?)'),
+)]
+
+# Direct video file URLs in page source. videoplayback URLs are found
+# separately by _find_videoplayback_urls. The patterns overlap (in
+# https://a/v.mp4/index.m3u8 the file pattern would consume the manifest),
+# so the manifests get their own scans rather than sharing an alternation.
+_PAGE_VIDEO_RE = _compile_scan(
+    r'https?://[^"\s<>]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v)(?:\?[^"\s<>]*)?', re.IGNORECASE)
+_PAGE_MANIFEST_RES = [(needle, _compile_scan(p, re.IGNORECASE)) for needle, p in (
+    ('.m3u8', r'https?://[^"\s<>]+\.m3u8(?:\?[^"\s<>]*)?'),
+    ('.mpd', r'https?://[^"\s<>]+\.mpd(?:\?[^"\s<>]*)?'),
+)]
+
+# JSON objects embedded in the page that contain video URLs
+_JSON_EMBED_RES = [_compile_scan(p, re.IGNORECASE | re.DOTALL) for p in (
+    r'({[^{}]*(?:"url"|"src"|"file"|"video")[^{}]*\.(?:mp4|m3u8|mpd)[^{}]*})',
+    r'(\[[^\[\]]*"[^"]*\.(?:mp4|m3u8|mpd)"[^\[\]]*\])',
+)]
+
+_JSON_UNESCAPE_RE = re.compile(r'\\(.)')
+
+# Fields shared by every pattern-extracted source. Copying a prebuilt dict is
+# cheaper than building an 11-key literal per match, and keeps the key order.
+_SOURCE_TEMPLATE = {
+    'url': None,
+    'quality': 0,
+    'format': 'unknown',
+    'filesize': 0,
+    'fps': 0,
+    'vcodec': 'unknown',
+    'acodec': 'unknown',
+    'method': None,
+    'title': 'Extracted Video',
+    'duration': 0,
+    'uploader': 'Unknown'
+}
+
+# JSON keys whose string values are treated as candidate video URLs
+_URL_KEYS = frozenset(('url', 'src', 'file', 'video', 'stream'))
+
+# Assignments that open a player config; the value itself is cut out with
+# _find_balanced_json rather than a lazy DOTALL match
+_PLAYER_CONFIG_START_RE = _compile_scan(
+    r'(?:window\.playerConfig\s*=|var\s+config\s*=|"sources":|"playlist":)\s*([\[{])',
+    re.IGNORECASE)
+
+# HTML video and source elements
+_VIDEO_ELEMENT_RE = _alternation((
+    r'<video[^>]*src=["\']([^"\']+)["\'][^>]*>',
+    r'<source[^>]*src=["\']([^"\']+)["\'][^>]*>',
+    r'data-src=["\']([^"\']+\.(?:mp4|webm|m4v))["\']',
+    r'data-video=["\']([^"\']+)["\']',
+), re.IGNORECASE)
+
+# JWPlayer and Video.js setup calls. These and the Vimeo pattern only locate
+# the opening brace; _find_json_values cuts out the balanced object, so no
+# lazy DOTALL match can sweep the rest of the page.
+_JWPLAYER_RE = _compile_scan(r'jwplayer\([^)]*\)\.setup\(\s*({)', re.IGNORECASE)
+_VIDEOJS_RE = _compile_scan(r'videojs\([^)]*,\s*({)', re.IGNORECASE)
+
+# Vimeo player config
+_VIMEO_CONFIG_RE = _compile_scan(r'window\.vimeoPlayerConfig\s*=\s*({)')
+_VIMEO_CONFIG_URL_RE = _compile_scan(r'"config_url":"([^"]+)"')
+
+# Common patterns for generic video hosting sites
+_HOSTING_RE = _alternation((
+    r'"file":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
+    r'"src":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
+    r'"url":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
+    r'file:\s*["\']([^"\']+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))["\']',
+    r'src:\s*["\']([^"\']+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))["\']',
+), re.IGNORECASE)
+
+
+# URL classification helpers. The same candidate URL is checked over and over
+# as overlapping patterns rediscover it, so results are memoised per URL.
+_VIDEO_EXT_RE = re.compile(r'\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v|m3u8|mpd)', re.IGNORECASE)
+_STREAMING_URL_HINTS = ('videoplayback', 'manifest', 'playlist', 'stream', '/video/', 'player')
+
+_QUALITY_LOOKUP = {
+    '4k': 2160, '2160p': 2160, '3840x2160': 2160,
+    '1440p': 1440, '2560x1440': 1440,
+    '1080p': 1080, '1920x1080': 1080, 'hd': 1080,
+    '720p': 720, '1280x720': 720,
+    '480p': 480, '854x480': 480,
+    '360p': 360, '640x360': 360,
+    '240p': 240, '426x240': 240,
+}
+# Longest tokens first so '3840x2160' is not consumed as a shorter match
+_QUALITY_RE = re.compile('|'.join(sorted(_QUALITY_LOOKUP, key=len, reverse=True)))
+
+# Bare quality numbers, as used in Vimeo file keys
+_QUALITY_NUMBER_RE = re.compile(r'2160|4k|1440|1080|720|480|360|240')
+_QUALITY_NUMBERS = {'2160': 2160, '4k': 2160, '1440': 1440, '1080': 1080,
+                    '720': 720, '480': 480, '360': 360, '240': 240}
+
+# Extension -> format name for _get_format_from_url, in priority order;
+# read-only because it is shared by every lookup
+_FORMAT_EXTENSIONS = MappingProxyType({
+    'mp4': 'mp4',
+    'avi': 'avi',
+    'mkv': 'mkv',
+    'mov': 'mov',
+    'wmv': 'wmv',
+    'flv': 'flv',
+    'webm': 'webm',
+    'm4v': 'm4v',
+    'm3u8': 'hls',
+    'mpd': 'dash',
+})
+_FORMAT_PRIORITY = MappingProxyType({ext: i for i, ext in enumerate(_FORMAT_EXTENSIONS)})
+_FORMAT_EXT_RE = re.compile(r'\.(' + '|'.join(_FORMAT_EXTENSIONS) + ')')
+
+# Formats whose URL is a playlist/manifest rather than the media itself
+_MANIFEST_FORMATS = frozenset(('hls', 'dash'))
+
+# Characters dropped from titles when building download filenames
+_FNAME_RE = re.compile(r'[^\w\-_.]')
+
+
+@functools.lru_cache(maxsize=4096)
+def _is_valid_video_url(url: str) -> bool:
+    """Check if a non-empty URL string looks like a video URL"""
+    # Clean the URL first
+    url = url.strip()
+    
+    # Check for malformed URLs
+    if url.startswith(',//') or '|' in url:
+        return False
+    
+    # Must start with http:// or https://
+    if not url.startswith(('http://', 'https://')):
+        return False
+    
+    # Check for video file extensions
+    if _VIDEO_EXT_RE.search(url):
+        return True
+    
+    # Check for streaming patterns
+    url_lower = url.lower()
+    return any(pattern in url_lower for pattern in _STREAMING_URL_HINTS)
+
+
+@functools.lru_cache(maxsize=4096)
+def _guess_quality_from_url(url: str) -> int:
+    """Guess video quality from URL and return as integer"""
+    url_lower = url.lower()
+    
+    # The highest quality named anywhere in the URL wins
+    tokens = _QUALITY_RE.findall(url_lower)
+    if tokens:
+        return max(_QUALITY_LOOKUP[token] for token in tokens)
+    
+    # If no quality found but it's a direct video file, assume decent quality
+    if any(ext in url_lower for ext in ['.mp4', '.mkv', '.avi', '.mov']):
+        # Check file size indicators or assume 720p for direct video files
+        if any(indicator in url_lower for indicator in ['high', 'hq', 'full']):
+            return 1080
+        else:
+            return 720
+    
+    return 0
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_format_from_url(url: str) -> str:
+    """Get video format from URL"""
+    extensions = _FORMAT_EXT_RE.findall(url.lower())
+    if not extensions:
+        return 'unknown'
+    
+    # Several extensions in one URL: the earliest in _FORMAT_EXTENSIONS wins
+    return _FORMAT_EXTENSIONS[min(extensions, key=_FORMAT_PRIORITY.__getitem__)]
+
+
+_ytdlp_pool = None
+_ytdlp_pool_lock = threading.Lock()
+# Jobs are only submitted when a worker is free, so the caller's deadline
+# never includes time spent queued behind other extractions
+_ytdlp_slots = threading.BoundedSemaphore(YTDLP_WORKERS)
+_ytdlp_cache = OrderedDict()
+_ytdlp_cache_lock = threading.Lock()
+
+
+def _get_ytdlp_pool() -> ProcessPoolExecutor:
+    """Return the shared yt-dlp process pool, starting it on first use"""
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        if _ytdlp_pool is None:
+            # spawn rather than fork: the API process is multi-threaded
+            _ytdlp_pool = ProcessPoolExecutor(max_workers=YTDLP_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn'))
+        return _ytdlp_pool
+
+
+def _reset_ytdlp_pool(pool: ProcessPoolExecutor, terminate: bool = False):
+    """Drop a broken or stuck yt-dlp pool so the next call starts a fresh one
+    
+    Nothing happens if pool was already replaced. With terminate set, the
+    worker processes are killed: a hung yt-dlp call never returns, and
+    shutdown() alone would leave it holding its worker slot.
+    """
+    global _ytdlp_pool
+    with _ytdlp_pool_lock:
+        if _ytdlp_pool is not pool:
+            return
+        _ytdlp_pool = None
+    
+    # ProcessPoolExecutor treats any dead worker as a broken pool, so there
+    # is no killing just one of them
+    
+    processes = list((getattr(pool, '_processes', None) or {}).values()) if terminate else []
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+class _YtdlpDeadline(BaseException):
+    """Raised in a yt-dlp worker when YTDLP_TIMEOUT passes
+    
+    A BaseException, so yt-dlp's own broad except clauses don't swallow it.
+    """
+
+
+def _raise_ytdlp_deadline(signum, frame):
+    raise _YtdlpDeadline()
+
+
+def _ytdlp_extract(url: str, format_spec: str) -> List[Dict]:
+    """Extract sources with yt-dlp; runs in a worker process of the yt-dlp pool
+    
+    Jobs run on the worker's main thread, so a SIGALRM timer interrupts a
+    hung call after YTDLP_TIMEOUT and the worker is free for the next job.
+    Where setitimer is missing (Windows) the caller's deadline is all there is.
+    """
+    has_timer = hasattr(signal, 'setitimer')
+    if has_timer:
+        signal.signal(signal.SIGALRM, _raise_ytdlp_deadline)
+        signal.setitimer(signal.ITIMER_REAL, YTDLP_TIMEOUT)
+    try:
+        return _run_ytdlp(url, format_spec)
+    except _YtdlpDeadline:
+        raise TimeoutError(f"no result after {YTDLP_TIMEOUT}s") from None
+    finally:
+        if has_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _run_ytdlp(url: str, format_spec: str) -> List[Dict]:
+    """Run yt-dlp on url and turn its formats into source dicts"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'format': format_spec,
+        # Bound each network read so a stalled site can't pin a worker
+        'socket_timeout': YTDLP_TIMEOUT,
+    }
+    
+    # Imported here rather than at the top: only pool workers run yt-dlp, so
+    # the API process never pays for loading its extractor modules
+    import yt_dlp
+    
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        # yt-dlp errors hold tracebacks, which can't be pickled back to the caller
+        raise RuntimeError(str(e)) from None
+    
+    sources = []
+    if 'formats' in info and info['formats']:
+        for fmt in info['formats']:
+            if fmt.get('url') and fmt.get('vcodec') != 'none':
+                sources.append({
+                    'url': fmt['url'],
+                    'quality': fmt.get('height', 0),
+                    'format': fmt.get('ext', 'unknown'),
+                    'filesize': fmt.get('filesize', 0),
+                    'fps': fmt.get('fps', 0),
+                    'vcodec': fmt.get('vcodec', 'unknown'),
+                    'acodec': fmt.get('acodec', 'unknown'),
+                    'method': 'yt-dlp',
+                    'title': info.get('title', 'Unknown'),
+                    'duration': info.get('duration', 0),
+                    'uploader': info.get('uploader', 'Unknown')
+                })
+    elif info.get('url'):
+        sources.append({
+            'url': info['url'],
+            'quality': 0,
+            'format': info.get('ext', 'unknown'),
+            'filesize': 0,
+            'fps': 0,
+            'vcodec': 'unknown',
+            'acodec': 'unknown',
+            'method': 'yt-dlp',
+            'title': info.get('title', 'Unknown'),
+            'duration': info.get('duration', 0),
+            'uploader': info.get('uploader', 'Unknown')
+        })
+    
+    return sources
+
+
+def _source_sort_key(source: Dict):
+    """Sort key for _process_sources: quality, then shorter URLs first"""
+    return source['quality'], -len(source['url'])
+
+
+def _release_response(response: requests.Response):
+    """Close a streamed response that won't be downloaded
+    
+    A small body is read first, so the keep-alive connection goes back to
+    the pool for the next request instead of being closed unread.
+    """
+    length = response.headers.get('content-length', '')
+    if length.isdigit() and int(length) <= ERROR_BODY_DRAIN_LIMIT:
+        response.content
+    response.close()
+
+
+# posix_fallocate errors meaning "not supported here" rather than a real
+# failure such as ENOSPC
+_FALLOCATE_UNSUPPORTED = frozenset((errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOSYS))
+
+
+def _open_for_download(output_path: str, total_size: int) -> int:
+    """Open output_path for a sequential download and return the descriptor
+    
+    The kernel is told the file is written sequentially, and a known size
+    is reserved up front so the file is laid out in few extents. Where
+    posix_fallocate is missing or unsupported (Windows, macOS, some
+    filesystems), the file is extended with ftruncate instead, which at
+    least sets the final length before any data is written. Any other
+    error, such as a full disk, is raised.
+    """
+    fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    if hasattr(os, 'posix_fadvise'):
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    if total_size > 0:
+        try:
+            os.posix_fallocate(fd, 0, total_size)
+        except AttributeError:
+            os.ftruncate(fd, total_size)
+        except OSError as e:
+            if e.errno not in _FALLOCATE_UNSUPPORTED:
+                os.close(fd)
+                raise
+            os.ftruncate(fd, total_size)
+    return fd
+
+
+def _write_all(fd: int, data: bytes):
+    """os.write until all of data is written"""
+    written = os.write(fd, data)
+    if written < len(data):
+        view = memoryview(data)
+        while written < len(data):
+            written += os.write(fd, view[written:])
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int):
+    """os.pwrite until all of data is written at offset"""
+    written = os.pwrite(fd, data, offset)
+    if written < len(data):
+        view = memoryview(data)
+        while written < len(data):
+            written += os.pwrite(fd, view[written:], offset + written)
+
+
+def _close_download(fd: int, written: int, total_size: int):
+    """Close a descriptor from _open_for_download after written bytes"""
+    try:
+        # A body that ended early must not keep the preallocated tail
+        if written < total_size:
+            os.ftruncate(fd, written)
+        # The finished file is not read back here, so drop it from the page
+        # cache rather than let it push out hotter pages
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def _progress_printer(total_size: int):
+    """Return a function that redraws the download progress line on stderr
+    
+    Calls within PROGRESS_INTERVAL of the last redraw are dropped unless
+    final is set, and the template and scale factors are worked out only
+    once. Callers that already read the clock can pass it as now. The line
+    goes straight to the descriptor, bypassing sys.stdout's lock and buffer.
+    """
+    mb_scale = 1.0 / 1048576.0
+    if total_size > 0:
+        template = '\r📊 Progress: %.1f%% (%.2f/' + '%.2f MB)' % (total_size * mb_scale)
+        percent_scale = 100.0 / total_size
+    else:
+        template = '\r📊 Downloaded: %.2f MB'
+    last_print = 0.0
+    
+    def show(downloaded: int, final: bool = False, now: float = None):
+        nonlocal last_print
+        if now is None:
+            now = time.monotonic()
+        if not final and now - last_print < PROGRESS_INTERVAL:
+            return
+        last_print = now
+        if total_size > 0:
+            line = template % (downloaded * percent_scale, downloaded * mb_scale)
+        else:
+            line = template % (downloaded * mb_scale)
+        try:
+            os.write(_PROGRESS_FD, line.encode())
+        except OSError:
+            # No usable stderr (closed or detached); progress is cosmetic
+            pass
+    
+    return show
 
 
 class SimpleVideoExtractor:
-    def __init__(self):
+    # Request headers download_video adds over the session's; requests merges
+    # session headers into every request, so they are not copied here
+    _DL_EXTRA = MappingProxyType({
+        'Range': 'bytes=0-',  # Support for resume
+        'Accept': '*/*',
+        'Accept-Encoding': 'identity',  # Disable compression for video
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'video',
+        'Sec-Fetch-Mode': 'no-cors',
+        'Sec-Fetch-Site': 'cross-site',
+    })
+    
+    def __init__(self, chunk_size: Optional[int] = None,
+                 max_chunk_size: int = MAX_DOWNLOAD_CHUNK_SIZE):
+        # Without an explicit chunk_size, progress downloads size their first
+        # read from the response length instead
+        self.chunk_size_configured = chunk_size is not None
+        self.chunk_size = max(int(chunk_size or DOWNLOAD_CHUNK_SIZE), MIN_DOWNLOAD_CHUNK_SIZE)
+        self.max_chunk_size = max(int(max_chunk_size), self.chunk_size)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
             'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
+            # Only advertise encodings urllib3 can decode; 'br' is included
+            # when the brotli package is installed
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
@@ -30,69 +761,140 @@ class SimpleVideoExtractor:
             'Sec-Fetch-User': '?1',
             'Cache-Control': 'max-age=0',
         })
-        self.original_url = None
+        # Keep-alive pool shared by extraction and download requests; sized so
+        # concurrent API threads reuse warm connections instead of discarding them.
+        # One retry covers a keep-alive socket the server closed while idle.
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=32, max_retries=Retry(total=1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Last-resort download session with none of the browser headers above;
+        # built once so repeated fallbacks reuse its connections, and given
+        # backed-off retries since it only runs after the other strategies failed
+        self._fallback_session = requests.Session()
+        self._fallback_session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': '*/*',
+        })
+        fallback_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                       max_retries=Retry(total=3, backoff_factor=0.3))
+        self._fallback_session.mount('http://', fallback_adapter)
+        self._fallback_session.mount('https://', fallback_adapter)
+        # URLs already turned into sources by the running extraction; kept per
+        # thread because one extractor instance serves concurrent requests
+        self._local = threading.local()
     
-    def extract_video_sources(self, url: str) -> List[Dict]:
-        """Extract video sources from URL"""
-        print(f"🔍 Analyzing URL: {url}")
-        self.original_url = url
+    def extract_video_sources(self, url: str, force_all: bool = False) -> List[Dict]:
+        """Extract video sources from URL
         
+        Stops after the first method that leaves enough direct MP4 sources,
+        unless force_all is set.
+        """
+        print(f"🔍 Analyzing URL: {url}")
+        self._local.seen_urls = set()
+        try:
+            return self._run_extraction(url, force_all)
+        finally:
+            self._local.seen_urls = None
+    
+    def close(self):
+        """Close the pooled connections of both HTTP sessions"""
+        self.session.close()
+        self._fallback_session.close()
+    
+    def _run_extraction(self, url: str, force_all: bool) -> List[Dict]:
+        """Run the extraction methods in turn and merge their sources"""
         video_sources = []
         
-        # Method 1: Enhanced page analysis with session handling (like 1DM)
-        print("🔎 Analyzing page with session handling...")
-        enhanced_sources = self._extract_with_session_handling(url)
-        if enhanced_sources:
-            video_sources.extend(enhanced_sources)
-            print(f"✅ Enhanced analysis found {len(enhanced_sources)} sources")
-        
-        # Method 2: Try yt-dlp (handles most major platforms)
-        print("📡 Trying yt-dlp extraction...")
-        ytdlp_sources = self._extract_with_ytdlp(url)
-        if ytdlp_sources:
-            video_sources.extend(ytdlp_sources)
-            print(f"✅ yt-dlp found {len(ytdlp_sources)} sources")
-        
-        # Method 3: Direct page analysis (fallback)
-        print("🔎 Analyzing page source...")
-        direct_sources = self._extract_from_page_source(url)
-        if direct_sources:
-            video_sources.extend(direct_sources)
-            print(f"✅ Page analysis found {len(direct_sources)} sources")
-        
-        # Method 4: Platform-specific extraction
-        print("🎯 Trying platform-specific methods...")
-        platform_sources = self._extract_platform_specific(url)
-        if platform_sources:
-            video_sources.extend(platform_sources)
-            print(f"✅ Platform-specific found {len(platform_sources)} sources")
+        # Fetch the page once; every page-based method below scans this body
+        # Visiting the page first also establishes the session and cookies
+        print("   🍪 Establishing session...")
+        try:
+            content = self._fetch_page(url)
+        except Exception as e:
+            # Empty body rather than None, so the methods below don't refetch
+            print(f"   ⚠️ Page fetch failed: {str(e)[:100]}...")
+            content = ''
+        
+        methods = [
+            # Method 1: Enhanced page analysis with session handling (like 1DM)
+            ("🔎 Analyzing page with session handling...", "Enhanced analysis",
+             lambda: self._extract_with_session_handling(url, content)),
+            # Method 3: Direct page analysis (fallback)
+            ("🔎 Analyzing page source...", "Page analysis",
+             lambda: self._extract_from_page_source(url, content)),
+            # Method 4: Platform-specific extraction
+            ("🎯 Trying platform-specific methods...", "Platform-specific",
+             lambda: self._extract_platform_specific(url, content)),
+        ]
+        # Method 2: Try yt-dlp (handles most major platforms). It is by far the
+        # slowest method, so on other sites it only runs if the page didn't
+        # already give us enough
+        ytdlp_method = ("📡 Trying yt-dlp extraction...", "yt-dlp",
+                        lambda: self._extract_with_ytdlp(url))
+        domain = urlparse(url).netloc.lower()
+        if any(domain == site or domain.endswith('.' + site) for site in YTDLP_FIRST_DOMAINS):
+            methods.insert(1, ytdlp_method)
+        else:
+            methods.append(ytdlp_method)
+        
+        for announcement, label, method in methods:
+            print(announcement)
+            found = method()
+            if found:
+                video_sources.extend(found)
+                print(f"✅ {label} found {len(found)} sources")
+            
+            if not force_all and self._has_enough_sources(video_sources):
+                print("⏭️ Enough direct sources found, skipping remaining methods")
+                break
         
         # Remove duplicates and sort by quality
         unique_sources = self._process_sources(video_sources)
         
         return unique_sources
     
-    def _extract_with_session_handling(self, url: str) -> List[Dict]:
+    def _has_enough_sources(self, sources: List[Dict]) -> bool:
+        """Whether sources already hold enough direct MP4s to stop early"""
+        direct = sum(1 for source in sources
+                     if source['format'] == 'mp4' and (source['quality'] or 0) >= 720)
+        return direct >= EARLY_EXIT_SOURCES
+    
+    def _fetch_page(self, url: str, headers: Optional[Dict] = None, timeout: int = 15) -> str:
+        """Fetch a page and return its body, raising on HTTP errors
+        
+        Only the first MAX_SCAN_BYTES are read; embedded players sit near the
+        top of the HTML, and regex cost grows with every byte scanned.
+        """
+        with self.session.get(url, headers=headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            body = response.raw.read(MAX_SCAN_BYTES, decode_content=True)
+            encoding = response.encoding or 'utf-8'
+        try:
+            text = body.decode(encoding, errors='replace')
+        except LookupError:
+            text = body.decode('utf-8', errors='replace')
+        return _unescape_slashes(text)
+    
+    def _extract_with_session_handling(self, url: str, content: Optional[str] = None) -> List[Dict]:
         """Enhanced extraction with proper session handling like 1DM"""
         try:
             # Step 1: Visit the page to establish session and get cookies
-            print("   🍪 Establishing session...")
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
+            if content is None:
+                content = self._fetch_page(url)
             
             # Step 2: Look for iframe sources and embedded players
             sources = []
-            content = response.text
             
             # Extract iframe sources (common in streaming sites)
-            iframe_pattern = r'<iframe[^>]*src=["\']([^"\']+)["\'][^>]*>'
-            iframe_matches = re.findall(iframe_pattern, content, re.IGNORECASE)
-            
-            for iframe_url in iframe_matches:
+            iframe_urls = []
+            for iframe_url in _IFRAME_RE.findall(content):
                 if any(keyword in iframe_url.lower() for keyword in ['player', 'embed', 'video', 'stream']):
                     print(f"   🎬 Found iframe: {iframe_url[:50]}...")
-                    iframe_sources = self._extract_from_iframe(iframe_url)
-                    sources.extend(iframe_sources)
+                    iframe_urls.append(iframe_url)
+            
+            for iframe_sources in self._map_concurrently(
+                    functools.partial(self._extract_from_iframe, page_url=url), iframe_urls):
+                sources.extend(iframe_sources)
             
             # Step 3: Look for JavaScript-generated video URLs
             js_sources = self._extract_javascript_urls(content)
@@ -112,75 +914,65 @@ class SimpleVideoExtractor:
             print(f"   ⚠️ Session handling failed: {str(e)[:100]}...")
             return []
     
-    def _extract_from_iframe(self, iframe_url: str) -> List[Dict]:
-        """Extract video sources from iframe"""
+    def _map_concurrently(self, func, items: List) -> List:
+        """Apply func to each item on a small thread pool, keeping input order"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        
+        # Pool threads share the caller's seen-URL set
+        seen_urls = getattr(self._local, 'seen_urls', None)
+        def run(item):
+            self._local.seen_urls = seen_urls
+            return func(item)
+        
+        with ThreadPoolExecutor(max_workers=min(SUBFETCH_WORKERS, len(items))) as executor:
+            return list(executor.map(run, items))
+    
+    def _extract_from_iframe(self, iframe_url: str, page_url: str) -> List[Dict]:
+        """Extract video sources from an iframe embedded in page_url"""
         try:
             # Make iframe URL absolute
             if iframe_url.startswith('//'):
                 iframe_url = 'https:' + iframe_url
             elif iframe_url.startswith('/'):
-                from urllib.parse import urljoin
-                iframe_url = urljoin(self.original_url, iframe_url)
-            
-            # Set proper referrer for iframe request
-            iframe_headers = self.session.headers.copy()
-            iframe_headers['Referer'] = self.original_url
+                iframe_url = urljoin(page_url, iframe_url)
             
+            # Set proper referrer for iframe request; requests merges these
+            # over the session headers, so there is no need to copy them
             print(f"   📺 Analyzing iframe: {iframe_url}")
-            response = self.session.get(iframe_url, headers=iframe_headers, timeout=10)
-            response.raise_for_status()
+            content = self._fetch_page(iframe_url, headers={'Referer': page_url}, timeout=10)
             
-            sources = []
-            content = response.text
-            
-            # Look for video sources in iframe
-            video_patterns = [
-                r'"file":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                r'"src":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                r'"url":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                r'source:\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
-                r'file:\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
-            ]
-            
-            for pattern in video_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    clean_url = match.replace('\\/', '/')
-                    if self._is_valid_video_url(clean_url):
-                        # Make URL absolute
-                        if clean_url.startswith('//'):
-                            clean_url = 'https:' + clean_url
-                        elif clean_url.startswith('/'):
-                            clean_url = urljoin(iframe_url, clean_url)
-                        
-                        sources.append(self._create_source_dict(clean_url, 'iframe_extraction'))
-            
-            return sources
+            return self._scan_iframe_content(content, iframe_url)
             
         except Exception as e:
             print(f"   ⚠️ Iframe extraction failed: {str(e)[:50]}...")
             return []
     
+    def _scan_iframe_content(self, content: str, iframe_url: str) -> List[Dict]:
+        """Extract video sources from a fetched iframe body"""
+        sources = []
+        
+        # Look for video sources in iframe
+        for clean_url in _find_all(_IFRAME_VIDEO_RE, content):
+            if self._is_valid_video_url(clean_url):
+                # Make URL absolute
+                if clean_url.startswith('//'):
+                    clean_url = 'https:' + clean_url
+                elif clean_url.startswith('/'):
+                    clean_url = urljoin(iframe_url, clean_url)
+                
+                self._add_source(sources, clean_url, 'iframe_extraction')
+        
+        return sources
+    
     def _extract_javascript_urls(self, content: str) -> List[Dict]:
         """Extract video URLs from JavaScript code"""
         sources = []
         
         # Look for JavaScript variables containing video URLs
-        js_patterns = [
-            r'var\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
-            r'let\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
-            r'const\s+\w+\s*=\s*["\']([^"\']+\.(?:mp4|m3u8|mpd))["\']',
-            r'videoUrl\s*[:=]\s*["\']([^"\']+)["\']',
-            r'streamUrl\s*[:=]\s*["\']([^"\']+)["\']',
-            r'playUrl\s*[:=]\s*["\']([^"\']+)["\']',
-        ]
-        
-        for pattern in js_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                clean_url = match.replace('\\/', '/')
-                if self._is_valid_video_url(clean_url):
-                    sources.append(self._create_source_dict(clean_url, 'javascript_extraction'))
+        for clean_url in _find_all(_JS_URL_RE, content):
+            if self._is_valid_video_url(clean_url):
+                self._add_source(sources, clean_url, 'javascript_extraction')
         
         return sources
     
@@ -189,169 +981,114 @@ class SimpleVideoExtractor:
         sources = []
         
         # Look for AJAX calls that might return video URLs
-        ajax_patterns = [
-            r'ajax\([^)]*url:\s*["\']([^"\']+)["\']',
-            r'fetch\(["\']([^"\']+)["\']',
-            r'XMLHttpRequest.*open\([^,]*,\s*["\']([^"\']+)["\']',
-        ]
-        
-        for pattern in ajax_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
+        api_urls = []
+        for needle, pattern in _AJAX_RES:
+            matches = _findall_if(needle, pattern, content, ignore_case=True)
             for match in matches:
                 if any(keyword in match.lower() for keyword in ['video', 'stream', 'play', 'media']):
-                    try:
-                        # Make URL absolute
-                        if match.startswith('/'):
-                            api_url = urljoin(base_url, match)
-                        else:
-                            api_url = match
-                        
-                        # Try to fetch from API endpoint
-                        api_headers = self.session.headers.copy()
-                        api_headers['Referer'] = base_url
-                        api_headers['X-Requested-With'] = 'XMLHttpRequest'
-                        
-                        api_response = self.session.get(api_url, headers=api_headers, timeout=5)
-                        if api_response.status_code == 200:
-                            api_data = api_response.text
-                            
-                            # Look for video URLs in API response
-                            api_video_patterns = [
-                                r'"url":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                                r'"file":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                                r'"src":\s*"([^"]+\.(?:mp4|m3u8|mpd))"',
-                            ]
-                            
-                            for api_pattern in api_video_patterns:
-                                api_matches = re.findall(api_pattern, api_data, re.IGNORECASE)
-                                for api_match in api_matches:
-                                    clean_url = api_match.replace('\\/', '/')
-                                    if self._is_valid_video_url(clean_url):
-                                        sources.append(self._create_source_dict(clean_url, 'api_extraction'))
-                    
-                    except Exception:
-                        continue
+                    # Make URL absolute
+                    if match.startswith('/'):
+                        api_urls.append(urljoin(base_url, match))
+                    else:
+                        api_urls.append(match)
+        
+        # Try to fetch from API endpoints
+        fetch = lambda api_url: self._fetch_api_endpoint(api_url, base_url)
+        for api_data in self._map_concurrently(fetch, api_urls):
+            if api_data is None:
+                continue
+            
+            # Look for video URLs in API response
+            for clean_url in _find_all(_API_VIDEO_RE, api_data):
+                if self._is_valid_video_url(clean_url):
+                    self._add_source(sources, clean_url, 'api_extraction')
         
         return sources
     
+    def _fetch_api_endpoint(self, api_url: str, base_url: str) -> Optional[str]:
+        """Fetch an AJAX endpoint the way the page would, or None on failure"""
+        try:
+            api_headers = {'Referer': base_url, 'X-Requested-With': 'XMLHttpRequest'}
+            return self._fetch_page(api_url, headers=api_headers, timeout=5)
+        except Exception:
+            return None
+    
     def _extract_streaming_patterns(self, content: str) -> List[Dict]:
         """Extract using patterns specific to streaming sites"""
         sources = []
         
-        # Enhanced patterns for streaming sites
-        streaming_patterns = [
-            # Base64 encoded URLs
-            r'data-src=["\']([^"\']*(?:mp4|m3u8|mpd)[^"\']*)["\']',
-            r'data-video=["\']([^"\']*)["\']',
-            
-            # Obfuscated URLs
-            r'atob\(["\']([^"\']+)["\']',
-            
-            # Player configurations
-            r'player\.setup\({[^}]*file:\s*["\']([^"\']+)["\']',
-            r'new\s+Plyr\([^,]*,\s*{[^}]*sources:\s*\[{[^}]*src:\s*["\']([^"\']+)["\']',
-            
-            # HLS/DASH manifests
-            r'([^"\s]+\.m3u8(?:\?[^"\s]*)?)',
-            r'([^"\s]+\.mpd(?:\?[^"\s]*)?)',
-            
-            # Direct video files with query parameters
-            r'(https?://[^"\s]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v)(?:\?[^"\s]*)?)',
-        ]
+        matches = _find_all(_STREAMING_RE, content)
+        for needle, pattern in _STREAMING_URL_RES:
+            matches.extend(_findall_if(needle, pattern, content, ignore_case=True))
+        for clean_url in matches:
+            if self._is_valid_video_url(clean_url):
+                self._add_source(sources, clean_url, 'streaming_pattern')
         
-        for pattern in streaming_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                clean_url = match.replace('\\/', '/')
-                
-                # Handle base64 encoded URLs
-                if pattern.startswith(r'atob'):
-                    try:
-                        import base64
-                        decoded = base64.b64decode(match).decode('utf-8')
-                        if self._is_valid_video_url(decoded):
-                            sources.append(self._create_source_dict(decoded, 'base64_extraction'))
-                    except:
-                        continue
-                elif self._is_valid_video_url(clean_url):
-                    sources.append(self._create_source_dict(clean_url, 'streaming_pattern'))
+        # Handle base64 encoded URLs
+        for match in _findall_if('atob(', _ATOB_RE, content, ignore_case=True):
+            try:
+                decoded = base64.b64decode(match).decode('utf-8')
+                if self._is_valid_video_url(decoded):
+                    self._add_source(sources, decoded, 'base64_extraction')
+            except:
+                continue
         
         return sources
     
     def _extract_with_ytdlp(self, url: str) -> List[Dict]:
         """Extract using yt-dlp"""
-        try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-                'format': 'best[ext=mp4]/best',
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                sources = []
-                if 'formats' in info and info['formats']:
-                    for fmt in info['formats']:
-                        if fmt.get('url') and fmt.get('vcodec') != 'none':
-                            sources.append({
-                                'url': fmt['url'],
-                                'quality': fmt.get('height', 0),
-                                'format': fmt.get('ext', 'unknown'),
-                                'filesize': fmt.get('filesize', 0),
-                                'fps': fmt.get('fps', 0),
-                                'vcodec': fmt.get('vcodec', 'unknown'),
-                                'acodec': fmt.get('acodec', 'unknown'),
-                                'method': 'yt-dlp',
-                                'title': info.get('title', 'Unknown'),
-                                'duration': info.get('duration', 0),
-                                'uploader': info.get('uploader', 'Unknown')
-                            })
-                elif info.get('url'):
-                    sources.append({
-                        'url': info['url'],
-                        'quality': 0,
-                        'format': info.get('ext', 'unknown'),
-                        'filesize': 0,
-                        'fps': 0,
-                        'vcodec': 'unknown',
-                        'acodec': 'unknown',
-                        'method': 'yt-dlp',
-                        'title': info.get('title', 'Unknown'),
-                        'duration': info.get('duration', 0),
-                        'uploader': info.get('uploader', 'Unknown')
-                    })
-                
-                return sources
-                
-        except Exception as e:
-            print(f"⚠️ yt-dlp failed: {str(e)[:100]}...")
-            return []
+        key = (url, YTDLP_FORMAT)
+        with _ytdlp_cache_lock:
+            entry = _ytdlp_cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                _ytdlp_cache.move_to_end(key)
+                return [dict(source) for source in entry[1]]
+        
+        with _ytdlp_slots:
+            pool = _get_ytdlp_pool()
+            future = None
+            try:
+                future = pool.submit(_ytdlp_extract, url, YTDLP_FORMAT)
+                sources = future.result(timeout=YTDLP_TIMEOUT + YTDLP_KILL_GRACE)
+            except TimeoutError:
+                if not future.done():
+                    # The worker's own deadline didn't fire, so it is stuck
+                    # outside Python; replace the pool to get the slot back
+                    _reset_ytdlp_pool(pool, terminate=True)
+                print(f"⚠️ yt-dlp failed: no result after {YTDLP_TIMEOUT}s")
+                return []
+            except BrokenProcessPool as e:
+                _reset_ytdlp_pool(pool)
+                print(f"⚠️ yt-dlp failed: worker process died ({str(e)[:80]})")
+                return []
+            except Exception as e:
+                print(f"⚠️ yt-dlp failed: {str(e)[:100]}...")
+                return []
+        
+        # Callers mutate source dicts, so the cache keeps its own copies
+        with _ytdlp_cache_lock:
+            _ytdlp_cache[key] = (time.monotonic() + YTDLP_CACHE_TTL, [dict(source) for source in sources])
+            _ytdlp_cache.move_to_end(key)
+            if len(_ytdlp_cache) > YTDLP_CACHE_SIZE:
+                _ytdlp_cache.popitem(last=False)
+        return sources
     
-    def _extract_from_page_source(self, url: str) -> List[Dict]:
+    def _extract_from_page_source(self, url: str, content: Optional[str] = None) -> List[Dict]:
         """Extract video URLs from page source"""
         try:
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            content = response.text
+            if content is None:
+                content = self._fetch_page(url)
             
             sources = []
             
             # Pattern 1: Direct video file URLs
-            video_patterns = [
-                r'https?://[^"\s<>]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v)(?:\?[^"\s<>]*)?',
-                r'https?://[^"\s<>]+/videoplayback\?[^"\s<>]*',
-                r'https?://[^"\s<>]+\.m3u8(?:\?[^"\s<>]*)?',
-                r'https?://[^"\s<>]+\.mpd(?:\?[^"\s<>]*)?',
-            ]
-            
-            for pattern in video_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    clean_url = self._clean_url(match)
-                    if self._is_valid_video_url(clean_url):
-                        sources.append(self._create_source_dict(clean_url, 'direct_pattern'))
+            matches = _PAGE_VIDEO_RE.findall(content) + _find_videoplayback_urls(content)
+            for needle, pattern in _PAGE_MANIFEST_RES:
+                matches.extend(_findall_if(needle, pattern, content, ignore_case=True))
+            for match in matches:
+                clean_url = self._clean_url(match)
+                if self._is_valid_video_url(clean_url):
+                    self._add_source(sources, clean_url, 'direct_pattern')
             
             # Pattern 2: JSON embedded data
             json_sources = self._extract_from_json_in_page(content)
@@ -376,38 +1113,24 @@ class SimpleVideoExtractor:
         sources = []
         
         # Find potential JSON objects containing video URLs
-        json_patterns = [
-            r'({[^{}]*(?:"url"|"src"|"file"|"video")[^{}]*\.(?:mp4|m3u8|mpd)[^{}]*})',
-            r'(\[[^\[\]]*"[^"]*\.(?:mp4|m3u8|mpd)"[^\[\]]*\])',
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
+        for pattern in _JSON_EMBED_RES:
+            matches = pattern.findall(content)
             for match in matches:
                 try:
                     # Clean up the JSON string
-                    clean_match = re.sub(r'\\(.)', r'\1', match)
+                    clean_match = _JSON_UNESCAPE_RE.sub(r'\1', match)
                     data = json.loads(clean_match)
                     self._extract_urls_from_json_recursive(data, sources)
                 except:
                     continue
         
         # Look for specific video player JSON configs
-        player_configs = [
-            r'window\.playerConfig\s*=\s*({.+?});',
-            r'var\s+config\s*=\s*({.+?});',
-            r'"sources":\s*(\[.+?\])',
-            r'"playlist":\s*(\[.+?\])',
-        ]
-        
-        for pattern in player_configs:
-            matches = re.findall(pattern, content, re.IGNORECASE | re.DOTALL)
-            for match in matches:
-                try:
-                    data = json.loads(match)
-                    self._extract_urls_from_json_recursive(data, sources)
-                except:
-                    continue
+        for match in _find_json_values(_PLAYER_CONFIG_START_RE, content):
+            try:
+                data = json.loads(match)
+                self._extract_urls_from_json_recursive(data, sources)
+            except:
+                continue
         
         return sources
     
@@ -416,19 +1139,10 @@ class SimpleVideoExtractor:
         sources = []
         
         # Find video and source elements
-        video_patterns = [
-            r'<video[^>]*src=["\']([^"\']+)["\'][^>]*>',
-            r'<source[^>]*src=["\']([^"\']+)["\'][^>]*>',
-            r'data-src=["\']([^"\']+\.(?:mp4|webm|m4v))["\']',
-            r'data-video=["\']([^"\']+)["\']',
-        ]
-        
-        for pattern in video_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                clean_url = self._clean_url(match)
-                if self._is_valid_video_url(clean_url):
-                    sources.append(self._create_source_dict(clean_url, 'html_element'))
+        for match in _find_all(_VIDEO_ELEMENT_RE, content):
+            clean_url = self._clean_url(match)
+            if self._is_valid_video_url(clean_url):
+                self._add_source(sources, clean_url, 'html_element')
         
         return sources
     
@@ -437,27 +1151,25 @@ class SimpleVideoExtractor:
         sources = []
         
         # JWPlayer configuration
-        jwplayer_pattern = r'jwplayer\([^)]*\)\.setup\(({.+?})\)'
-        matches = re.findall(jwplayer_pattern, content, re.IGNORECASE | re.DOTALL)
+        matches = _find_json_values(_JWPLAYER_RE, content) if 'jwplayer' in _lower_page(content) else []
         for match in matches:
             try:
                 config = json.loads(match)
                 if 'file' in config:
                     url = config['file']
                     if self._is_valid_video_url(url):
-                        sources.append(self._create_source_dict(url, 'jwplayer'))
+                        self._add_source(sources, url, 'jwplayer')
                 elif 'sources' in config:
                     for source in config['sources']:
                         if isinstance(source, dict) and 'file' in source:
                             url = source['file']
                             if self._is_valid_video_url(url):
-                                sources.append(self._create_source_dict(url, 'jwplayer'))
+                                self._add_source(sources, url, 'jwplayer')
             except:
                 continue
         
         # Video.js configuration
-        videojs_pattern = r'videojs\([^)]*,\s*({.+?})\)'
-        matches = re.findall(videojs_pattern, content, re.IGNORECASE | re.DOTALL)
+        matches = _find_json_values(_VIDEOJS_RE, content) if 'videojs' in _lower_page(content) else []
         for match in matches:
             try:
                 config = json.loads(match)
@@ -466,13 +1178,13 @@ class SimpleVideoExtractor:
                         if isinstance(source, dict) and 'src' in source:
                             url = source['src']
                             if self._is_valid_video_url(url):
-                                sources.append(self._create_source_dict(url, 'videojs'))
+                                self._add_source(sources, url, 'videojs')
             except:
                 continue
         
         return sources
     
-    def _extract_platform_specific(self, url: str) -> List[Dict]:
+    def _extract_platform_specific(self, url: str, content: Optional[str] = None) -> List[Dict]:
         """Platform-specific extraction methods"""
         sources = []
         
@@ -480,7 +1192,7 @@ class SimpleVideoExtractor:
         
         # Vimeo
         if 'vimeo.com' in domain:
-            sources.extend(self._extract_vimeo(url))
+            sources.extend(self._extract_vimeo(url, content))
         
         # Dailymotion
         elif 'dailymotion.com' in domain:
@@ -492,65 +1204,62 @@ class SimpleVideoExtractor:
         
         # Generic video hosting sites
         else:
-            sources.extend(self._extract_generic_hosting(url))
+            sources.extend(self._extract_generic_hosting(url, content))
         
         return sources
     
-    def _extract_vimeo(self, url: str) -> List[Dict]:
+    def _extract_vimeo(self, url: str, content: Optional[str] = None) -> List[Dict]:
         """Extract Vimeo video sources"""
         try:
-            response = self.session.get(url)
-            content = response.text
+            if content is None:
+                content = self._fetch_page(url)
             
             sources = []
             
             # Look for Vimeo player config
-            config_patterns = [
-                r'window\.vimeoPlayerConfig\s*=\s*({.+?});',
-                r'"config_url":"([^"]+)"',
-            ]
-            
-            for pattern in config_patterns:
-                matches = re.findall(pattern, content, re.DOTALL)
-                for match in matches:
-                    if match.startswith('http'):
-                        # Config URL found, fetch it
-                        try:
-                            config_response = self.session.get(match)
-                            config_data = config_response.json()
-                            if 'request' in config_data and 'files' in config_data['request']:
-                                files = config_data['request']['files']
-                                for quality, file_info in files.items():
-                                    if isinstance(file_info, dict) and 'url' in file_info:
-                                        sources.append({
-                                            'url': file_info['url'],
-                                            'quality': self._parse_quality(quality),
-                                            'format': 'mp4',
-                                            'filesize': 0,
-                                            'method': 'vimeo_config',
-                                            'title': 'Vimeo Video'
-                                        })
-                        except:
-                            continue
-                    else:
-                        # Direct config found
-                        try:
-                            config = json.loads(match)
-                            if 'request' in config and 'files' in config['request']:
-                                files = config['request']['files']
-                                for quality, file_info in files.items():
-                                    if isinstance(file_info, dict) and 'url' in file_info:
-                                        sources.append({
-                                            'url': file_info['url'],
-                                            'quality': self._parse_quality(quality),
-                                            'format': 'mp4',
-                                            'filesize': 0,
-                                            'method': 'vimeo_config',
-                                            'title': 'Vimeo Video'
-                                        })
-                        except:
-                            continue
-            
+            matches = []
+            if 'vimeoPlayerConfig' in content:
+                matches.extend(_find_json_values(_VIMEO_CONFIG_RE, content))
+            matches.extend(_findall_if('"config_url"', _VIMEO_CONFIG_URL_RE, content))
+            for match in matches:
+                if match.startswith('http'):
+                    # Config URL found, fetch it
+                    try:
+                        config_response = self.session.get(match)
+                        config_data = config_response.json()
+                        if 'request' in config_data and 'files' in config_data['request']:
+                            files = config_data['request']['files']
+                            for quality, file_info in files.items():
+                                if isinstance(file_info, dict) and 'url' in file_info:
+                                    sources.append({
+                                        'url': file_info['url'],
+                                        'quality': self._parse_quality(quality),
+                                        'format': 'mp4',
+                                        'filesize': 0,
+                                        'method': 'vimeo_config',
+                                        'title': 'Vimeo Video'
+                                    })
+                    except:
+                        continue
+                else:
+                    # Direct config found
+                    try:
+                        config = json.loads(match)
+                        if 'request' in config and 'files' in config['request']:
+                            files = config['request']['files']
+                            for quality, file_info in files.items():
+                                if isinstance(file_info, dict) and 'url' in file_info:
+                                    sources.append({
+                                        'url': file_info['url'],
+                                        'quality': self._parse_quality(quality),
+                                        'format': 'mp4',
+                                        'filesize': 0,
+                                        'method': 'vimeo_config',
+                                        'title': 'Vimeo Video'
+                                    })
+                    except:
+                        continue
+        
             return sources
             
         except Exception:
@@ -566,29 +1275,18 @@ class SimpleVideoExtractor:
         # Twitch requires complex authentication and is best handled by yt-dlp
         return []
     
-    def _extract_generic_hosting(self, url: str) -> List[Dict]:
+    def _extract_generic_hosting(self, url: str, content: Optional[str] = None) -> List[Dict]:
         """Extract from generic video hosting sites"""
         try:
-            response = self.session.get(url)
-            content = response.text
+            if content is None:
+                content = self._fetch_page(url)
             
             sources = []
             
             # Common patterns for video hosting sites
-            hosting_patterns = [
-                r'"file":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
-                r'"src":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
-                r'"url":\s*"([^"]+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))"',
-                r'file:\s*["\']([^"\']+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))["\']',
-                r'src:\s*["\']([^"\']+\.(?:mp4|avi|mkv|mov|wmv|flv|webm|m4v))["\']',
-            ]
-            
-            for pattern in hosting_patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
-                for match in matches:
-                    clean_url = match.replace('\\/', '/')
-                    if self._is_valid_video_url(clean_url):
-                        sources.append(self._create_source_dict(clean_url, 'generic_hosting'))
+            for clean_url in _find_all(_HOSTING_RE, content):
+                if self._is_valid_video_url(clean_url):
+                    self._add_source(sources, clean_url, 'generic_hosting')
             
             return sources
             
@@ -596,36 +1294,45 @@ class SimpleVideoExtractor:
             return []
     
     def _extract_urls_from_json_recursive(self, data, sources: List[Dict]):
-        """Recursively extract URLs from JSON data"""
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key.lower() in ['url', 'src', 'file', 'video', 'stream'] and isinstance(value, str):
-                    if self._is_valid_video_url(value):
-                        sources.append(self._create_source_dict(value, 'json_extraction'))
-                elif isinstance(value, (dict, list)):
-                    self._extract_urls_from_json_recursive(value, sources)
-        elif isinstance(data, list):
-            for item in data:
-                if isinstance(item, (dict, list)):
-                    self._extract_urls_from_json_recursive(item, sources)
-                elif isinstance(item, str) and self._is_valid_video_url(item):
-                    sources.append(self._create_source_dict(item, 'json_extraction'))
+        """Extract URLs from nested JSON data, depth-first"""
+        # Explicit stack: deeply nested payloads can't hit the recursion limit.
+        # Children are pushed reversed so they pop in their original order.
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            children = []
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if isinstance(value, str):
+                        if key.lower() in _URL_KEYS and self._is_valid_video_url(value):
+                            self._add_source(sources, value, 'json_extraction')
+                    elif isinstance(value, (dict, list)):
+                        children.append(value)
+            elif isinstance(node, list):
+                for item in node:
+                    if isinstance(item, (dict, list)):
+                        children.append(item)
+                    elif isinstance(item, str) and self._is_valid_video_url(item):
+                        self._add_source(sources, item, 'json_extraction')
+            stack.extend(reversed(children))
+    
+    def _add_source(self, sources: List[Dict], url: str, method: str):
+        """Append a source for url unless this extraction already produced one"""
+        seen_urls = getattr(self._local, 'seen_urls', None)
+        if seen_urls is not None:
+            if url in seen_urls:
+                return
+            seen_urls.add(url)
+        sources.append(self._create_source_dict(url, method))
     
     def _create_source_dict(self, url: str, method: str) -> Dict:
         """Create a standardized source dictionary"""
-        return {
-            'url': url,
-            'quality': self._guess_quality_from_url(url),
-            'format': self._get_format_from_url(url),
-            'filesize': 0,
-            'fps': 0,
-            'vcodec': 'unknown',
-            'acodec': 'unknown',
-            'method': method,
-            'title': 'Extracted Video',
-            'duration': 0,
-            'uploader': 'Unknown'
-        }
+        source = _SOURCE_TEMPLATE.copy()
+        source['url'] = url
+        source['quality'] = self._guess_quality_from_url(url)
+        source['format'] = self._get_format_from_url(url)
+        source['method'] = method
+        return source
     
     def _clean_url(self, url: str) -> str:
         """Clean and normalize URL"""
@@ -652,194 +1359,118 @@ class SimpleVideoExtractor:
         """Check if URL is a valid video URL"""
         if not url or not isinstance(url, str) or len(url) < 10:
             return False
-        
-        # Clean the URL first
-        url = url.strip()
-        
-        # Check for malformed URLs
-        if url.startswith(',//') or '|' in url:
-            return False
-        
-        # Must start with http:// or https://
-        if not url.startswith(('http://', 'https://')):
-            return False
-        
-        url_lower = url.lower()
-        
-        # Check for video file extensions
-        video_extensions = ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.m3u8', '.mpd']
-        for ext in video_extensions:
-            if ext in url_lower:
-                return True
-        
-        # Check for streaming patterns
-        streaming_patterns = ['videoplayback', 'manifest', 'playlist', 'stream', '/video/', 'player']
-        for pattern in streaming_patterns:
-            if pattern in url_lower:
-                return True
-        
-        return False
+        return _is_valid_video_url(url)
     
     def _guess_quality_from_url(self, url: str) -> int:
         """Guess video quality from URL and return as integer"""
-        url_lower = url.lower()
-        
-        quality_patterns = {
-            2160: ['4k', '2160p', '3840x2160'],
-            1440: ['1440p', '2560x1440'],
-            1080: ['1080p', '1920x1080', 'hd'],
-            720: ['720p', '1280x720'],
-            480: ['480p', '854x480'],
-            360: ['360p', '640x360'],
-            240: ['240p', '426x240'],
-        }
-        
-        for quality, patterns in quality_patterns.items():
-            for pattern in patterns:
-                if pattern in url_lower:
-                    return quality
-        
-        # If no quality found but it's a direct video file, assume decent quality
-        if any(ext in url_lower for ext in ['.mp4', '.mkv', '.avi', '.mov']):
-            # Check file size indicators or assume 720p for direct video files
-            if any(indicator in url_lower for indicator in ['high', 'hq', 'full']):
-                return 1080
-            else:
-                return 720
-        
-        return 0
+        return _guess_quality_from_url(url)
     
     def _parse_quality(self, quality_str: str) -> int:
         """Parse quality string to integer"""
         if isinstance(quality_str, int):
             return quality_str
         
-        quality_str = str(quality_str).lower()
-        
-        if '2160' in quality_str or '4k' in quality_str:
-            return 2160
-        elif '1440' in quality_str:
-            return 1440
-        elif '1080' in quality_str:
-            return 1080
-        elif '720' in quality_str:
-            return 720
-        elif '480' in quality_str:
-            return 480
-        elif '360' in quality_str:
-            return 360
-        elif '240' in quality_str:
-            return 240
-        else:
-            return 0
+        tokens = _QUALITY_NUMBER_RE.findall(str(quality_str).lower())
+        return max((_QUALITY_NUMBERS[token] for token in tokens), default=0)
     
     def _get_format_from_url(self, url: str) -> str:
         """Get video format from URL"""
-        url_lower = url.lower()
-        
-        format_map = {
-            '.mp4': 'mp4',
-            '.avi': 'avi',
-            '.mkv': 'mkv',
-            '.mov': 'mov',
-            '.wmv': 'wmv',
-            '.flv': 'flv',
-            '.webm': 'webm',
-            '.m4v': 'm4v',
-            '.m3u8': 'hls',
-            '.mpd': 'dash',
-        }
-        
-        for ext, fmt in format_map.items():
-            if ext in url_lower:
-                return fmt
-        
-        return 'unknown'
+        return _get_format_from_url(url)
     
     def _process_sources(self, sources: List[Dict]) -> List[Dict]:
         """Remove duplicates and sort sources"""
-        # Remove duplicates based on URL and filter invalid URLs
-        seen_urls = set()
-        unique_sources = []
-        
+        # Remove duplicates based on the cleaned URL and filter invalid URLs;
+        # the dict keeps the first source seen for each URL, in order
+        unique = {}
+        clean = self._clean_url
         for source in sources:
-            url = source['url']
-            # Clean the URL and check if it's valid
-            clean_url = self._clean_url(url)
-            if clean_url and self._is_valid_video_url(clean_url) and clean_url not in seen_urls:
-                seen_urls.add(clean_url)
-                source['url'] = clean_url  # Update with cleaned URL
-                
-                # Ensure quality is an integer
-                if source['quality'] is None or not isinstance(source['quality'], int):
-                    source['quality'] = 0
-                
-                # Try to detect quality from filename if not already detected
-                if source['quality'] == 0:
-                    source['quality'] = self._guess_quality_from_url(clean_url)
-                
-                unique_sources.append(source)
+            clean_url = clean(source['url'])
+            if clean_url and clean_url not in unique and _is_valid_video_url(clean_url):
+                unique[clean_url] = source
         
-        # Sort by quality (highest first), then by URL length (shorter URLs often more reliable)
-        unique_sources.sort(key=lambda x: (x['quality'], -len(x['url'])), reverse=True)
+        for clean_url, source in unique.items():
+            source['url'] = clean_url  # Update with cleaned URL
+            
+            # Ensure quality is an integer, detecting it from the filename if unset
+            quality = source['quality']
+            if not isinstance(quality, int) or quality == 0:
+                quality = _guess_quality_from_url(clean_url)
+            source['quality'] = quality
         
-        return unique_sources
+        # Sort by quality (highest first), then by URL length (shorter URLs often more reliable)
+        return sorted(unique.values(), key=_source_sort_key, reverse=True)
     
-    def download_video(self, video_source: Dict, output_path: str = None) -> bool:
-        """Download video from source with enhanced session handling"""
+    def download_video(self, video_source: Dict, output_path: str = None, quiet: bool = False,
+                       referer: Optional[str] = None) -> bool:
+        """Download video from source with enhanced session handling
+        
+        referer is the page the source was extracted from.
+        """
         try:
             url = video_source['url']
             
             if not output_path:
                 title = video_source.get('title', 'video').replace(' ', '_')
-                title = re.sub(r'[^\w\-_.]', '', title)  # Remove invalid filename chars
+                title = _FNAME_RE.sub('', title)  # Remove invalid filename chars
                 format_ext = video_source.get('format', 'mp4')
                 output_path = f"{title}.{format_ext}"
             
             print(f"🔽 Downloading: {url[:80]}{'...' if len(url) > 80 else ''}")
             print(f"📁 Output: {output_path}")
             
-            # Enhanced headers for protected downloads
-            download_headers = self.session.headers.copy()
+            # Enhanced headers for protected downloads (the extras 1DM uses)
+            download_headers = dict(self._DL_EXTRA)
             
             # Set proper referrer (crucial for protected sites)
-            if self.original_url:
-                download_headers['Referer'] = self.original_url
-            
-            # Add additional headers that 1DM uses
-            download_headers.update({
-                'Range': 'bytes=0-',  # Support for resume
-                'Accept': '*/*',
-                'Accept-Encoding': 'identity',  # Disable compression for video
-                'Connection': 'keep-alive',
-                'Sec-Fetch-Dest': 'video',
-                'Sec-Fetch-Mode': 'no-cors',
-                'Sec-Fetch-Site': 'cross-site',
-            })
+            if referer:
+                download_headers['Referer'] = referer
+            
+            # HLS/DASH manifests are small text files that compress well, so
+            # let the server compress them and skip the range machinery
+            is_manifest = video_source.get('format') in _MANIFEST_FORMATS
+            if is_manifest:
+                download_headers['Accept-Encoding'] = ACCEPT_ENCODING
+                del download_headers['Range']
+            
+            # Probe once so the strategies below can be picked from the
+            # response headers instead of by failed full downloads
+            probe = self._probe_download(url, download_headers)
+            status, server, total_size, accepts_ranges = probe or (0, '', 0, False)
+            # Cloudflare refuses the desktop browser headers outright; start
+            # from the mobile User-Agent instead
+            blocked = status == 403 and 'cloudflare' in server
             
             # Try multiple download strategies
             success = False
             
+            # Strategy 0: Parallel range download for large range-capable files
+            if not is_manifest and accepts_ranges and total_size >= RANGE_MIN_SIZE:
+                try:
+                    if self._download_ranged(url, download_headers, output_path, total_size, quiet):
+                        return True
+                except Exception as e:
+                    print(f"\n   ⚠️ Parallel download failed: {str(e)[:50]}...")
+            
             # Strategy 1: Direct download with enhanced headers
-            try:
-                print("   🔄 Trying direct download...")
-                response = self.session.get(url, headers=download_headers, stream=True, timeout=30)
-                response.raise_for_status()
-                success = self._download_stream(response, output_path)
-                if success:
-                    return True
-            except Exception as e:
-                print(f"   ⚠️ Direct download failed: {str(e)[:50]}...")
+            if blocked:
+                print("   ⏭️ Server blocked the probe, skipping direct download")
+            else:
+                try:
+                    print("   🔄 Trying direct download...")
+                    response = self._open_download(self.session, url, download_headers)
+                    success = self._download_stream(response, output_path, quiet)
+                    if success:
+                        return True
+                except Exception as e:
+                    print(f"   ⚠️ Direct download failed: {str(e)[:50]}...")
             
             # Strategy 2: Download with different User-Agent
             try:
                 print("   🔄 Trying with mobile User-Agent...")
-                mobile_headers = download_headers.copy()
-                mobile_headers['User-Agent'] = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
+                download_headers['User-Agent'] = 'Mozilla/5.0 (iPhone; CPU iPhone OS 14_7_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.2 Mobile/15E148 Safari/604.1'
                 
-                response = self.session.get(url, headers=mobile_headers, stream=True, timeout=30)
-                response.raise_for_status()
-                success = self._download_stream(response, output_path)
+                response = self._open_download(self.session, url, download_headers)
+                success = self._download_stream(response, output_path, quiet)
                 if success:
                     return True
             except Exception as e:
@@ -851,30 +1482,25 @@ class SimpleVideoExtractor:
                 curl_headers = {
                     'User-Agent': 'curl/7.68.0',
                     'Accept': '*/*',
-                    'Referer': self.original_url if self.original_url else '',
+                    'Referer': referer or '',
                 }
                 
-                response = self.session.get(url, headers=curl_headers, stream=True, timeout=30)
-                response.raise_for_status()
-                success = self._download_stream(response, output_path)
+                response = self._open_download(self.session, url, curl_headers)
+                success = self._download_stream(response, output_path, quiet)
                 if success:
                     return True
             except Exception as e:
                 print(f"   ⚠️ Curl-style download failed: {str(e)[:50]}...")
             
-            # Strategy 4: Try with fresh session
+            # Strategy 4: Try with the clean fallback session
             try:
                 print("   🔄 Trying with fresh session...")
-                fresh_session = requests.Session()
-                fresh_session.headers.update({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Referer': self.original_url if self.original_url else '',
-                    'Accept': '*/*',
-                })
-                
-                response = fresh_session.get(url, stream=True, timeout=30)
-                response.raise_for_status()
-                success = self._download_stream(response, output_path)
+                # Drop cookies left by earlier fallbacks so each one starts clean
+                self._fallback_session.cookies.clear()
+                response = self._open_download(
+                    self._fallback_session, url,
+                    {'Referer': referer or ''})
+                success = self._download_stream(response, output_path, quiet)
                 if success:
                     return True
             except Exception as e:
@@ -887,11 +1513,121 @@ class SimpleVideoExtractor:
             print(f"\n❌ Download failed: {e}")
             return False
     
-    def _download_stream(self, response, output_path: str) -> bool:
-        """Download from response stream with enhanced progress tracking"""
+    def _open_download(self, session: requests.Session, url: str, headers: Dict):
+        """Start a streamed download GET, raising HTTPError on an error status"""
+        response = session.get(url, headers=headers, stream=True, timeout=30)
+        if response.status_code >= 400:
+            _release_response(response)
+            response.raise_for_status()
+        return response
+    
+    def _probe_download(self, url: str, headers: Dict) -> Optional[Tuple[int, str, int, bool]]:
+        """Probe url with the download headers before fetching it
+        
+        Sends HEAD, or a one-byte range GET where HEAD is refused. Returns
+        (status, lowercased Server header, total size or 0, whether byte ranges
+        are served), or None if the probe itself failed.
+        """
+        try:
+            response = self.session.head(url, headers=headers, timeout=10, allow_redirects=True)
+            if response.status_code in (405, 501):
+                probe_headers = headers.copy()
+                probe_headers['Range'] = 'bytes=0-0'
+                response = self.session.get(url, headers=probe_headers, stream=True, timeout=10)
+                _release_response(response)
+        except requests.RequestException as e:
+            print(f"   ⚠️ Download probe failed: {str(e)[:50]}...")
+            return None
+        
+        server = response.headers.get('server', '').lower()
+        # A 206 Content-Range carries the full size; otherwise fall back to
+        # Content-Length and the Accept-Ranges advertisement
+        content_range = response.headers.get('content-range', '')
+        if response.status_code == 206 and '/' in content_range:
+            total = content_range.rsplit('/', 1)[1]
+            return response.status_code, server, int(total) if total.isdigit() else 0, True
+        
+        length = response.headers.get('content-length', '')
+        total_size = int(length) if length.isdigit() else 0
+        accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+        return response.status_code, server, total_size, accepts_ranges
+    
+    def _download_ranged(self, url: str, headers: Dict, output_path: str, total_size: int,
+                         quiet: bool = False) -> bool:
+        """Download url as RANGE_WORKERS concurrent byte ranges
+        
+        The server must serve byte ranges of a total_size-byte body, as found
+        by _probe_download. Each part checks for a 206 and raises otherwise.
+        """
+        if not hasattr(os, 'pwrite'):
+            return False
+        
+        print(f"   🔄 Trying parallel download ({RANGE_WORKERS} parts)...")
+        print(f"📊 File size: {total_size / (1024 * 1024):.2f} MB ({total_size:,} bytes)")
+        
+        part_size = -(-total_size // RANGE_WORKERS)
+        parts = [(start, min(start + part_size, total_size) - 1)
+                 for start in range(0, total_size, part_size)]
+        progress_lock = threading.Lock()
+        show_progress = _progress_printer(total_size)
+        downloaded = 0
+        # Set by the first part to fail; the file is discarded then, so the
+        # other parts stop instead of downloading the rest for nothing
+        aborted = threading.Event()
+        
+        def fetch_part(part):
+            nonlocal downloaded
+            start, end = part
+            part_headers = headers.copy()
+            part_headers['Range'] = f'bytes={start}-{end}'
+            try:
+                with self.session.get(url, headers=part_headers, stream=True, timeout=30) as response:
+                    if response.status_code != 206:
+                        raise ValueError(f"range request returned {response.status_code}")
+                    offset = start
+                    while offset <= end and not aborted.is_set():
+                        chunk = response.raw.read(min(self.chunk_size, end + 1 - offset), decode_content=True)
+                        if not chunk:
+                            break
+                        _pwrite_all(fd, chunk, offset)
+                        offset += len(chunk)
+                        with progress_lock:
+                            downloaded += len(chunk)
+                            if not quiet:
+                                show_progress(downloaded)
+                    if offset != end + 1 and not aborted.is_set():
+                        raise IOError(f"range {start}-{end} ended after {offset - start} bytes")
+            except Exception:
+                aborted.set()
+                raise
+        
+        # Parts write at their own offsets into a file pre-sized to the total
+        fd = _open_for_download(output_path, total_size)
+        written = 0
+        try:
+            with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+                for future in [executor.submit(fetch_part, part) for part in parts]:
+                    future.result()
+            written = total_size
+        finally:
+            # A failed part can leave holes anywhere, so an incomplete file is
+            # emptied; the serial strategies then rewrite it
+            _close_download(fd, written, total_size)
+        if not quiet:
+            show_progress(downloaded, final=True)
+        
+        print(f"\n✅ Download completed: {output_path}")
+        print(f"📁 Final size: {total_size / (1024 * 1024):.2f} MB ({total_size:,} bytes)")
+        return True
+    
+    def _download_stream(self, response, output_path: str, quiet: bool = False) -> bool:
+        """Download from response stream with enhanced progress tracking
+        
+        With quiet set there is no progress line, and the body is copied with
+        shutil.copyfileobj instead of the adaptive read loop.
+        """
         try:
             total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
             
             # Print initial file size info
             if total_size > 0:
@@ -900,20 +1636,17 @@ class SimpleVideoExtractor:
             else:
                 print("📊 File size: Unknown (streaming)")
             
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            percent = (downloaded / total_size) * 100
-                            downloaded_mb = downloaded / (1024 * 1024)
-                            total_mb = total_size / (1024 * 1024)
-                            print(f"\r📊 Progress: {percent:.1f}% ({downloaded_mb:.2f}/{total_mb:.2f} MB)", end='', flush=True)
-                        else:
-                            downloaded_mb = downloaded / (1024 * 1024)
-                            print(f"\r📊 Downloaded: {downloaded_mb:.2f} MB", end='', flush=True)
+            if quiet:
+                response.raw.decode_content = True
+                fd = _open_for_download(output_path, total_size)
+                try:
+                    with open(fd, 'wb', closefd=False) as f:
+                        shutil.copyfileobj(response.raw, f, self.chunk_size)
+                finally:
+                    downloaded = os.lseek(fd, 0, os.SEEK_CUR)
+                    _close_download(fd, downloaded, total_size)
+            else:
+                downloaded = self._copy_with_progress(response, output_path, total_size)
             
             # Verify file was downloaded and show final size
             if downloaded > 0:
@@ -928,12 +1661,80 @@ class SimpleVideoExtractor:
         except Exception as e:
             print(f"\n❌ Stream download failed: {e}")
             return False
+    
+    def _copy_with_progress(self, response, output_path: str, total_size: int) -> int:
+        """Write the response body to output_path, redrawing the progress line
+        
+        Returns the number of bytes written.
+        """
+        downloaded = 0
+        # A configured size or an unknown length starts from self.chunk_size;
+        # the throughput checks below move it either way
+        if total_size > 0 and not self.chunk_size_configured:
+            chunk_size = max(MIN_DOWNLOAD_CHUNK_SIZE,
+                             min(INITIAL_CHUNK_CAP, self.max_chunk_size, total_size // 512))
+        else:
+            chunk_size = self.chunk_size
+        
+        # Read from urllib3 directly (decoding as iter_content does) in small
+        # blocks, collecting them until chunk_size bytes can be written at
+        # once; an empty read means EOF
+        raw = response.raw
+        pending = bytearray()
+        written = 0
+        window_start = time.monotonic()
+        window_bytes = 0
+        slowest_write = 0.0
+        best_rate = 0.0
+        show_progress = _progress_printer(total_size)
+        
+        fd = _open_for_download(output_path, total_size)
+        try:
+            while True:
+                chunk = raw.read(min(chunk_size, DOWNLOAD_READ_SIZE), decode_content=True)
+                if not chunk:
+                    break
+                
+                pending += chunk
+                now = time.monotonic()
+                if len(pending) >= chunk_size:
+                    _write_all(fd, pending)
+                    written += len(pending)
+                    pending.clear()
+                    write_end = time.monotonic()
+                    slowest_write = max(slowest_write, write_end - now)
+                    now = write_end
+                size = len(chunk)
+                downloaded += size
+                window_bytes += size
+                
+                elapsed = now - window_start
+                if elapsed >= CHUNK_WINDOW_SECONDS:
+                    rate = window_bytes / elapsed
+                    best_rate = max(best_rate, rate)
+                    if rate < best_rate * CHUNK_SHRINK_RATIO:
+                        chunk_size = max(MIN_DOWNLOAD_CHUNK_SIZE, chunk_size // 2)
+                    elif slowest_write < CHUNK_FAST_WRITE_SECONDS:
+                        chunk_size = min(self.max_chunk_size, chunk_size * 2)
+                    window_start = now
+                    window_bytes = 0
+                    slowest_write = 0.0
+                
+                show_progress(downloaded, now=now)
+            
+            if pending:
+                _write_all(fd, pending)
+                written += len(pending)
+        finally:
+            _close_download(fd, written, total_size)
+        show_progress(downloaded, final=True)
+        return downloaded
 
 
 def main():
     if len(sys.argv) < 2:
         print("🎥 Simple Video Source Extractor")
-        print("Usage: python simple_video_extractor.py <URL> [--download] [--output <path>]")
+        print("Usage: python simple_video_extractor.py <URL> [--download] [--output <path>] [--chunk-size <bytes>] [--quiet]")
         print("\nExamples:")
         print("  python simple_video_extractor.py https://example.com/video")
         print("  python simple_video_extractor.py https://vimeo.com/123456 --download")
@@ -942,6 +1743,7 @@ def main():
     
     url = sys.argv[1]
     download = '--download' in sys.argv
+    quiet = '--quiet' in sys.argv
     output_path = None
     
     if '--output' in sys.argv:
@@ -949,10 +1751,16 @@ def main():
         if output_index + 1 < len(sys.argv):
             output_path = sys.argv[output_index + 1]
     
+    chunk_size = None
+    if '--chunk-size' in sys.argv:
+        chunk_index = sys.argv.index('--chunk-size')
+        if chunk_index + 1 < len(sys.argv):
+            chunk_size = int(sys.argv[chunk_index + 1])
+    
     print("🎥 Simple Video Source Extractor")
     print("=" * 50)
     
-    extractor = SimpleVideoExtractor()
+    extractor = SimpleVideoExtractor(chunk_size=chunk_size)
     sources = extractor.extract_video_sources(url)
     
     if not sources:
@@ -981,7 +1789,7 @@ def main():
     
     if download and sources:
         print("🔽 Starting download of best quality source...")
-        success = extractor.download_video(sources[0], output_path)
+        success = extractor.download_video(sources[0], output_path, quiet=quiet, referer=url)
         if success:
             print("🎉 Download completed successfully!")
         else: